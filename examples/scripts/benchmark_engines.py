@@ -0,0 +1,29 @@
+from pathlib import Path
+import timeit
+import pbdp
+
+
+def benchmark_engines(repeat=3):
+    """Compare the import time of the bundled data files with each parser engine."""
+    data_path = Path(pbdp.__path__[0], "input", "data")
+
+    parser = pbdp.Parser()
+    print(f"{'File':<16}{'c [s]':>10}{'pyarrow [s]':>14}")
+    for file in parser.look_for_files(data_path):
+        times = []
+        for engine in ["c", "pyarrow"]:
+            try:
+                times.append(min(timeit.repeat(
+                    lambda: parser.data_importer(
+                        file, save_option="", engine=engine
+                    ),
+                    number=1,
+                    repeat=repeat,
+                )))
+            except Exception:
+                times.append(float("nan"))
+        print(f"{file.name:<16}{times[0]:>10.3f}{times[1]:>14.3f}")
+
+
+if __name__ == "__main__":
+    benchmark_engines()
@@ -0,0 +1,109 @@
+from pathlib import Path
+import hashlib
+import logging
+import pandas as pd
+
+
+def file_fingerprint(file_path: Path, block_size: int = 65536) -> str:
+    """
+    Fingerprint a file from its size, modification time and the hash of its first
+    and last blocks, without reading the whole file.
+
+    Args:
+        file_path (Path): The path of the file.
+        block_size (int, optional): Number of bytes hashed at each end of the file.
+                                    Defaults to 65536.
+
+    Returns:
+        str: The fingerprint of the file.
+    """
+    stat = file_path.stat()
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with file_path.open("rb") as f:
+        digest.update(f.read(block_size))
+        if stat.st_size > 2 * block_size:
+            f.seek(-block_size, 2)
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def cache_paths(file_path: Path, key: str, folder: str = "cache") -> tuple:
+    """
+    Get the paths of the cached data and record of a file for a cache key. The
+    cache of each file is stored in its own directory, in a subdirectory of the
+    processed folder.
+
+    Args:
+        file_path (Path): The path of the original input file.
+        key (str): The cache key of the file.
+        folder (str, optional): The subdirectory of the processed folder. Defaults
+                                to "cache", where save_cache replaces the previous
+                                cached imports of the file.
+
+    Returns:
+        tuple: The paths to the parquet file of the data and to the pickle file of
+               the warnings, metadata and sanity check report.
+    """
+    cache_dir = file_path.parent / "processed" / folder / file_path.name
+    return cache_dir / f"{key}.parquet", cache_dir / f"{key}.pickle"
+
+
+def load_cache(file_path: Path, key: str,
+               logger_name: str = 'pbdp_logger') -> tuple:
+    """
+    Load the cached import of a file.
+
+    Args:
+        file_path (Path): The path of the original input file.
+        key (str): The cache key of the file, see Parser.cache_key.
+
+    Returns:
+        tuple: The cleaned DataFrame, the warnings, the metadata record and the
+               sanity check report of the file, or None if it is not cached.
+    """
+    logger = logging.getLogger(logger_name)
+    data_path, record_path = cache_paths(file_path, key)
+    if not (data_path.exists() and record_path.exists()):
+        return None
+    try:
+        data = pd.read_parquet(data_path)
+        record = pd.read_pickle(record_path)
+    except Exception as e:
+        logger.warning(f"Cached import of {file_path} could not be read: {e}")
+        return None
+    logger.info(f"Cached import of {file_path} loaded from {data_path}")
+    return (data, *record)
+
+
+def save_cache(result: tuple, file_path: Path, key: str,
+               logger_name: str = 'pbdp_logger') -> Path:
+    """
+    Cache the import of a file, replacing the previous cached imports of the file.
+
+    Args:
+        result (tuple): The cleaned DataFrame, the warnings, the metadata record
+                        and the sanity check report of the file.
+        file_path (Path): The path of the original input file.
+        key (str): The cache key of the file, see Parser.cache_key.
+
+    Returns:
+        Path: The path to the cached data, or None if the data could not be
+              stored as parquet.
+    """
+    logger = logging.getLogger(logger_name)
+    data_path, record_path = cache_paths(file_path, key)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    for path in data_path.parent.iterdir():
+        path.unlink()
+
+    data, *record = result
+    try:
+        data.to_parquet(data_path, index=False)
+    except Exception as e:
+        # Columns of mixed types cannot be stored as parquet
+        logger.warning(f"Import of {file_path} could not be cached: {e}")
+        data_path.unlink(missing_ok=True)
+        return None
+    pd.to_pickle(record, record_path)
+    logger.info(f"Import of {file_path} cached at {data_path}")
+    return data_path
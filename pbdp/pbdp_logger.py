@@ -1,4 +1,5 @@
 import logging
+import logging.handlers
 from pathlib import Path
 
 # This is the default logger
@@ -23,3 +24,25 @@ def create_logger(logger_name="pbdp_logger", logger_level=logging.INFO):
     logger.addHandler(file_handler)
     logger.info("Logger created")
     return logger
+
+
+class ForwardHandler(logging.Handler):
+    """
+    Handler passing records to the logger they were created for, so that records
+    logged in worker processes are handled by the logger of the main process.
+    """
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def init_worker_logger(queue, logger_name="pbdp_logger", logger_level=logging.INFO):
+    """
+    Send the records of a worker process to a queue, to be read by a
+    logging.handlers.QueueListener in the main process.
+    """
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logger_level)
+    # Drop any handler inherited from the main process to avoid duplicate records
+    logger.handlers = [logging.handlers.QueueHandler(queue)]
+    logger.propagate = False
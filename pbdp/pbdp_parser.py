@@ -1,17 +1,31 @@
+import hashlib
+import io
+import itertools
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
 import chardet
 import openpyxl
 import csv
+import shutil
 from pathlib import Path
 import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from .states import add_state_label
-from .save import save_file
+from .save import save_file, save_metadata
+from .cache import cache_paths, file_fingerprint, load_cache, save_cache
+from .version import __version__
 from .plots import display_data, plot_current_voltage_diff
-from typing import Union
+from .pbdp_logger import ForwardHandler, init_worker_logger
+from typing import BinaryIO, Union
 from typing import List
 
 
@@ -31,6 +45,12 @@ class Parser:
         standard_time (list): List of standard time columns to be processed.
         standard_headers (dict): Dictionary mapping standard column headers to
                                     their variations.
+        header_window (int): Size in bytes of the leading window used to detect
+                             the data header, 0 to read the whole file.
+        metadata_cache_size (int): Number of files whose metadata fields are
+                                   cached by parse_metadata.
+        numeric_metadata_fields (tuple): Fields of the metadata record converted
+                                         to numbers by extract_metadata.
     """
 
     def __init__(
@@ -39,6 +59,12 @@ class Parser:
         standard_units: dict = {},
         standard_time: list = [],
         standard_headers: dict = {},
+        cycler_dtypes: dict = {},
+        start_time_patterns: dict = {},
+        metadata_fields: dict = {},
+        header_window: int = 0,
+        metadata_cache_size: int = 16,
+        numeric_metadata_fields: tuple = ("channel", "mass", "capacity"),
         logger_name: str = "pbdp_logger",
     ):
         self.logger = logging.getLogger(logger_name)
@@ -53,11 +79,37 @@ class Parser:
             standard_time (list): List of standard time columns.
             standard_headers (dict): Mapping of header variables to standardized
                                      variables.
+            cycler_dtypes (dict): Column data types for each cycler, applied when the
+                                  data is read.
+            start_time_patterns (dict): Patterns of the start date and time of an
+                                        experiment in the metadata, by priority. Each
+                                        pattern captures the value in one group.
+            metadata_fields (dict): Patterns of the fields of the metadata record
+                                    for each cycler, e.g. channel or cell. Each
+                                    pattern captures the value in one group.
+            header_window (int): Number of leading bytes read when looking for the
+                                 data header. The window is doubled until a
+                                 keyword is found or the end of the file is
+                                 reached. Defaults to 0, which reads the whole
+                                 file.
+            metadata_cache_size (int): Number of files whose metadata fields are
+                                       cached by parse_metadata. Defaults to 16.
+            numeric_metadata_fields (tuple): Fields of the metadata record converted
+                                             to numbers by extract_metadata.
+                                             Defaults to ("channel", "mass",
+                                             "capacity").
             logger_name (str): Name of the logger to use, defaults to "pbdp_logger"
                                which is the default logger. That can be initialized
                                using pbdp.create_logger() function.
         """
 
+        # Settings compiled on first use, e.g. the keyword patterns used by
+        # find_words, see _compiled
+        self._compiled_settings = {}
+        # Fields found in the metadata of the last few files, by hash of the
+        # metadata
+        self._metadata_cache = {}
+
         # Initialize the class variables based on provided arguments.
         # Data header row options to terminate meta info. NOTE: enter unique
         # names provided by the cycler and not generic e.g. "TestTime"
@@ -187,8 +239,269 @@ class Parser:
             else standard_headers
         )
 
+        # Data types of the columns of each cycler, so that the data is parsed
+        # to its final type instead of being inferred and converted afterwards.
+        # Only the counters and codes are narrowed, the measured channels stay
+        # float64 so that their values are the same as when they are inferred
+        self.cycler_dtypes = (
+            {
+                "maccor": {
+                    "Rec": "int32",
+                    "Cycle P": "int32",
+                    "Cycle C": "int32",
+                    "Step": "int32",
+                    "TestTime": "float64",
+                    "StepTime": "float64",
+                    "Cap. [Ah]": "float64",
+                    "Ener. [Wh]": "float64",
+                    "Current [A]": "float64",
+                    "Voltage [V]": "float64",
+                    "Md": "category",
+                    "ES": "int32",
+                },
+                "digatron": {
+                    "Step": "int32",
+                    "Status": "category",
+                    "Step Time": "float64",
+                    "Prog Time": "float64",
+                    "Cycle": "int32",
+                    "Cycle Level": "int32",
+                    "Procedure": "category",
+                    "Voltage": "float64",
+                    "Current": "float64",
+                    "AhAccu": "float64",
+                    "AhPrev": "float64",
+                    "WhAccu": "float64",
+                    "Watt": "float64",
+                    "LogTemp001": "float64",
+                },
+            }
+            if bool(cycler_dtypes) is False
+            else cycler_dtypes
+        )
+
+        # Patterns of the start date and time in the metadata, the first field
+        # found in this order gives the start time
+        self.start_time_patterns = (
+            {
+                "Start Time": r"Start Time,?(\d+/\d+/\d+ \d+:\d+:\d+ [APM]+)",
+                "Test Date": r"Test Date:?,?\"?(\d+/\d+/\d+ \d+:\d+:\d+)",
+                "Start date": r"Start date:, (\d+ \w+ \d+)",
+                # Start time with timezone offset
+                "Start time": r"Start time:, (\d+:\d+:\d+ \+\d+:\d+)",
+                "Technique started on": (
+                    r"Technique started on : (\d+/\d+/\d+ \d+:\d+:\d+)"
+                ),
+                # DATE and TIME with tab-separated LABEL
+                "DATE": r"DATE\tLABEL\t(\d+/\d+/\d+)",
+                "TIME": r"TIME\tLABEL\t(\d+:\d+:\d+)",
+                "Date of Test": (
+                    r"Date of Test:?,?\"?(\d+ \w+ \d+, \d+:\d+:\d+ [APM]+)"
+                ),
+                "Started": r"Started,(\d+/\d+/\d+ \d+:\d+)",
+                "Modify on": r"Modify on : (\d+/\d+/\d+ \d+:\d+)",
+                "Acquisition started on": (
+                    r"Acquisition started on : (\d+/\d+/\d+ \d+:\d+:\d+)"
+                ),
+                # Date in ISO format
+                "Date": r"Date,(\d+-\d+-\d+ \d+:\d+:\d+),",
+                "Time": r"Time,(\d+:\d+:\d+),",
+            }
+            if bool(start_time_patterns) is False
+            else start_time_patterns
+        )
+
+        # Fields extracted from the metadata of each cycler into the metadata
+        # record of a file
+        self.metadata_fields = (
+            {
+                "maccor": {
+                    "name": r"Name:,([^,\r\n]+)",
+                    "channel": r"Channel:,([^,\r\n]+)",
+                    "tester": r"Tester,([^,\r\n]+)",
+                    "procedure": r"Procedure,([^,\r\n]+)",
+                    "description": r"Description,([^,\r\n]+)",
+                },
+                "digatron": {
+                    "measurement_id": r"Measurement ID,([^,\r\n]+)",
+                    "cell": r"Battery Name,([^,\r\n]+)",
+                    "channel": r"Circuit,([^,\r\n]+)",
+                    "procedure": r"Program,([^,\r\n]+)",
+                },
+                "novonix": {
+                    "channel": r"Channel: ([^,\r\n]+)",
+                    "cell": r"Serial Number: ([^,\r\n]+)",
+                    "description": r"Description: ([^,\r\n]+)",
+                    "procedure": r"Protocol: ([^,\r\n]+)",
+                    "mass": r"Mass \(g\): ([^,\r\n]+)",
+                    "capacity": r"Capacity \(Ah\): ([^,\r\n]+)",
+                },
+                "gamry": {
+                    "name": r"TITLE\tLABEL\t([^\t\r\n]+)",
+                    "potentiostat": r"PSTAT\tPSTAT\t([^\t\r\n]+)",
+                    "procedure": r"SIGNALPROFILE\tLABEL\t([^\t\r\n]+)",
+                    "capacity": r"CAPACITY\tQUANT\t([^\t\r\n]+)",
+                },
+            }
+            if bool(metadata_fields) is False
+            else metadata_fields
+        )
+
+        # Size of the leading window used to find the data header
+        self.header_window = header_window
+
+        # Outcome of each file of the last import, see data_importer
+        self.import_report = {}
+
+        # Number of files whose metadata fields are cached
+        self.metadata_cache_size = metadata_cache_size
+
+        # Fields of the metadata record converted to numbers
+        self.numeric_metadata_fields = tuple(numeric_metadata_fields)
+
         self.logger.info("Parser initialized")
 
+    def _compiled(self, setting: str, compile) -> object:
+        """
+        Compile a setting of the parser, e.g. cycler_keywords, once, and again
+        whenever it changes, whether it is reassigned or edited in place. The
+        setting is compared to a snapshot of it taken when it was compiled.
+
+        Args:
+            setting (str): The name of the setting.
+            compile (callable): Function compiling the value of the setting.
+
+        Returns:
+            object: The compiled setting.
+        """
+        value = getattr(self, setting)
+        snapshot = repr(value)
+        cached = self._compiled_settings.get(setting)
+        if cached is None or cached[0] != snapshot:
+            cached = (snapshot, compile(value))
+            self._compiled_settings[setting] = cached
+        return cached[1]
+
+    @staticmethod
+    def _compile_keywords(cycler_keywords: dict) -> tuple:
+        """
+        Compile the keywords of cycler_keywords.
+
+        Returns:
+            tuple: The pattern of each cycler, used when the cycler is given, the
+                   cycler of each named group and the combined pattern of all the
+                   cyclers.
+        """
+        def keywords_pattern(keywords):
+            patterns = []
+            for phrase in keywords:
+                # Split the phrase into words and escape each word
+                escaped_words = [re.escape(word) for word in phrase.split()]
+                # Join the words with '\s*' to allow for flexible whitespace
+                patterns.append(r'\s*'.join(escaped_words))
+            return "|".join(patterns)
+
+        # Compile a regex pattern for each cycler, used when the cycler is given
+        cycler_patterns = {
+            equipment_type: re.compile(keywords_pattern(keywords))
+            for equipment_type, keywords in cycler_keywords.items()
+        }
+        # Combine all the cyclers in a single pattern with one named group per
+        # cycler, so that the file is scanned only once. On a tie the first cycler
+        # in the dictionary wins
+        cycler_groups = {
+            f"cycler{i}": equipment_type
+            for i, equipment_type in enumerate(cycler_keywords)
+        }
+        keywords_pattern = re.compile("|".join(
+            f"(?P<{group}>{keywords_pattern(cycler_keywords[equipment_type])})"
+            for group, equipment_type in cycler_groups.items()
+        ))
+        return cycler_patterns, cycler_groups, keywords_pattern
+
+    @classmethod
+    def _compile_headers(cls, standard_headers: dict) -> dict:
+        """
+        Map each normalized header to its standard header once, so that the
+        headers of a file are looked up instead of compared to every value. On a
+        tie the first standard header in the dictionary wins.
+        """
+        header_lookup = {}
+        for header, values in standard_headers.items():
+            for value in values:
+                header_lookup.setdefault(cls._normalize_header(value), header)
+        return header_lookup
+
+    @staticmethod
+    def _normalize_header(header: str) -> str:
+        """Normalize a header to a common format."""
+        # Lowercase and remove special characters
+        header = header.lower()
+        header = re.sub(r'\s+|\[|\]|/|,', '', header)
+        return header
+
+    def _compile_start_time(self, start_time_patterns: dict) -> tuple:
+        """
+        Compile the patterns of start_time_patterns, dropping the fields cached
+        for the previous patterns.
+        """
+        self._metadata_cache = {}
+        return self._compile_fields(start_time_patterns)
+
+    @classmethod
+    def _compile_cycler_fields(cls, metadata_fields: dict) -> dict:
+        """Compile the patterns of metadata_fields for each cycler."""
+        return {
+            equipment_type: cls._compile_fields(patterns)
+            for equipment_type, patterns in metadata_fields.items()
+        }
+
+    @staticmethod
+    def _compile_fields(patterns: dict) -> tuple:
+        """
+        Compile the patterns of metadata fields, each capturing its value in one
+        group.
+
+        Returns:
+            tuple: The compiled pattern of each field, the field of each named group
+                   and the combined pattern of all the fields.
+        """
+        # Compile a regex pattern for each field, used to read its value
+        field_patterns = {
+            field: re.compile(pattern, re.IGNORECASE)
+            for field, pattern in patterns.items()
+        }
+        # Combine all the fields in a single pattern with one named group per field,
+        # so that the metadata is scanned only once. The groups are lookaheads, so
+        # that a field does not hide another one starting inside it
+        field_groups = {f"field{i}": field for i, field in enumerate(patterns)}
+        fields_pattern = re.compile("|".join(
+            f"(?=(?P<{group}>{patterns[field]}))"
+            for group, field in field_groups.items()
+        ), re.IGNORECASE)
+        return field_patterns, field_groups, fields_pattern
+
+    @staticmethod
+    def _find_fields(metadata: str, compiled_fields: tuple) -> dict:
+        """
+        Find the first value of each field compiled by _compile_fields in a single
+        pass over the metadata.
+
+        Returns:
+            dict: The value of each field found, in the order of the patterns.
+        """
+        field_patterns, field_groups, fields_pattern = compiled_fields
+        found = {}
+        for match in fields_pattern.finditer(metadata):
+            field = field_groups[match.lastgroup]
+            if field not in found:
+                found[field] = field_patterns[field].match(
+                    metadata, match.start()
+                ).group(1)
+                if len(found) == len(field_groups):
+                    break
+        return {field: found[field] for field in field_patterns if field in found}
+
     def look_for_files(self, path_or_file: Path) -> List[Path]:
         """
         Locate files based on the provided path or file.
@@ -263,11 +576,307 @@ class Parser:
         self.logger.debug(f"Excel file, {file_path}, converted to CSV, {csv_file_path}")
         return csv_file_path
 
+    def read_xlsx(
+        self, file_path: Path, cycler: str = "", save_option: str = "",
+        chunk_rows: int = 65536, sheet_name: str = None,
+    ) -> tuple:
+        """
+        Read a sheet of an Excel (xlsx) file into a DataFrame.
+
+        The rows of the sheet are streamed from the workbook in read-only mode. The
+        rows before the first one containing the keywords of a cycler are kept as
+        metadata, and the rows after it are collected into a DataFrame in chunks,
+        without writing a temporary CSV file.
+
+        Args:
+            file_path (Path): The path to the Excel file to be read.
+            cycler (str, optional): The cycler whose keywords mark the header row,
+                                    or the number of the header row. Defaults to
+                                    "", which searches the keywords of all the
+                                    cyclers.
+            save_option (str, optional): If "save all", the metadata and the data are
+                                         saved in the pre_processed folder, as in
+                                         split_file. Defaults to "".
+            chunk_rows (int, optional): Number of rows collected before being added
+                                        to the DataFrame. Defaults to 65536.
+            sheet_name (str, optional): Name of the sheet to read. Defaults to None,
+                                        which reads the active sheet.
+
+        Returns:
+            tuple: The metadata as CSV bytes encoded in utf-8, the data as a
+                   DataFrame and the equipment type.
+
+        Raises:
+            ValueError: If the header row is not found.
+        """
+        cycler_patterns, cycler_groups, keywords_pattern = self._compiled(
+            "cycler_keywords", self._compile_keywords
+        )
+        if str(cycler).isnumeric():
+            pattern, header_row = None, int(cycler)
+        elif not cycler:
+            pattern, header_row = keywords_pattern, None
+        elif cycler in self.cycler_keywords.keys():
+            pattern, header_row = cycler_patterns[cycler], None
+        else:
+            self.logger.warning(f"Cycler {cycler} is not yet supported")
+            raise ValueError(f"Cycler {cycler} is not yet supported")
+
+        workbook = openpyxl.load_workbook(
+            str(file_path.resolve()), read_only=True, data_only=True
+        )
+        try:
+            sheet = workbook.active if sheet_name is None else workbook[sheet_name]
+            self.logger.debug(f"Excel file, {file_path}, opened in read-only mode")
+            rows = sheet.iter_rows(values_only=True)
+
+            # Write the rows as CSV lines until the header row is found
+            metadata = []
+            line = io.StringIO()
+            writer = csv.writer(line)
+            header = equipment_type = None
+            for number, row in enumerate(rows, start=1):
+                line.seek(0)
+                line.truncate()
+                writer.writerow(row)
+                if header_row is not None:
+                    if number == header_row:
+                        header, equipment_type = row, "cannot determine"
+                        break
+                else:
+                    match = pattern.search(line.getvalue())
+                    if match:
+                        header = row
+                        equipment_type = (
+                            cycler_groups[match.lastgroup] if not cycler
+                            else cycler
+                        )
+                        break
+                metadata.append(line.getvalue())
+
+            if header is None:
+                self.logger.warning(f"No keywords found in file, {file_path}")
+                raise ValueError(f"No header found in file: {file_path}")
+            self.logger.info(f"Header found in file, {file_path}, at row {number}")
+
+            # Collect the data rows in chunks to bound the number of Python objects.
+            # Date and time cells are written as text, as in a CSV file of the
+            # sheet, and the types of the other columns are then inferred
+            chunks = []
+            while True:
+                chunk = list(itertools.islice(rows, chunk_rows))
+                if not chunk:
+                    break
+                chunk = pd.DataFrame(chunk, dtype=object)
+                for col in chunk.columns:
+                    chunk[col] = chunk[col].map(
+                        lambda value: str(value)
+                        if isinstance(value, (datetime, time, timedelta)) else value
+                    )
+                chunks.append(chunk.infer_objects())
+        finally:
+            workbook.close()
+
+        data = (
+            pd.concat(chunks, ignore_index=True) if chunks
+            else pd.DataFrame(columns=range(len(header)))
+        )
+
+        # Name the columns as pandas does when reading a CSV file
+        names = []
+        for i in range(max(len(header), data.shape[1])):
+            name = header[i] if i < len(header) else None
+            name = f"Unnamed: {i}" if name is None else str(name)
+            mangled, count = name, 0
+            while mangled in names:
+                count += 1
+                mangled = f"{name}.{count}"
+            names.append(mangled)
+        data = data.reindex(columns=range(len(names)))
+        data.columns = names
+        self.logger.info(f"Excel file, {file_path}, read into a DataFrame")
+
+        # Apply the data types of the cycler as read_data_to_pandas does
+        dtype = {
+            col: col_type
+            for col, col_type in self.cycler_dtypes.get(equipment_type, {}).items()
+            if col in data.columns
+        }
+        try:
+            data = data.astype(dtype)
+        except (ValueError, TypeError) as e:
+            self.logger.warning(f"Data types not applied to file, {file_path}: {e}")
+
+        metadata = "".join(metadata).encode("utf-8")
+        if save_option == "save all":
+            output_dir = file_path.parent / "pre_processed"
+            output_dir.mkdir(exist_ok=True)
+            name = file_path.stem if sheet_name is None else \
+                f"{file_path.stem}_{sheet_name}"
+            metadata_output_path = output_dir / (name + "_metadata.txt")
+            metadata_output_path.write_bytes(metadata)
+            self.logger.info(f"Metadata saved to {metadata_output_path}")
+            data_output_path = output_dir / (name + "_data.csv")
+            data.to_csv(data_output_path, index=False)
+            self.logger.info(f"Data saved to {data_output_path}")
+
+        return metadata, data, equipment_type
+
+    def read_xlsx_sheets(
+        self,
+        file_path: Path,
+        cycler: str = "",
+        save_option: str = "",
+        sheets: Union[str, List[str]] = "active",
+        workers: int = 1,
+    ) -> list:
+        """
+        Read the data sheets of an Excel (xlsx) file with read_xlsx.
+
+        Args:
+            file_path (Path): The path to the Excel file to be read.
+            cycler (str, optional): The cycler whose keywords mark the header row,
+                                    or the number of the header row. Defaults to "".
+            save_option (str, optional): Option for saving the sheets, as in
+                                         read_xlsx. Defaults to "".
+            sheets (str or List[str], optional): "active" to read the active sheet,
+                                                 "all" to read every sheet with a
+                                                 header row, or a list of sheet
+                                                 names. Defaults to "active".
+            workers (int, optional): Number of processes used to read the sheets in
+                                     parallel. Defaults to 1.
+
+        Returns:
+            list: The metadata, data and equipment type of each data sheet, in the
+                  order of the workbook.
+
+        Raises:
+            ValueError: If no data sheet is found.
+        """
+        if sheets == "active":
+            return [self.read_xlsx(file_path, cycler, save_option)]
+
+        if sheets == "all":
+            workbook = openpyxl.load_workbook(str(file_path.resolve()), read_only=True)
+            sheets = workbook.sheetnames
+            workbook.close()
+        kwargs = {"cycler": cycler, "save_option": save_option}
+
+        # Sheets without a header row, such as summaries, are skipped
+        results = {}
+        if workers > 1 and len(sheets) > 1:
+            self.logger.info(f"Reading {len(sheets)} sheets with {workers} workers")
+            for sheet_name, future in self._run_in_pool(
+                self._read_xlsx_sheet, sheets, workers, file_path=file_path, **kwargs
+            ):
+                results[sheet_name] = future.result()
+        else:
+            for sheet_name in sheets:
+                results[sheet_name] = self._read_xlsx_sheet(
+                    sheet_name, file_path=file_path, **kwargs
+                )
+
+        data_sheets = [results[name] for name in sheets if results[name] is not None]
+        if not data_sheets:
+            self.logger.warning(f"No data sheet found in file, {file_path}")
+            raise ValueError(f"No data sheet found in file: {file_path}")
+        self.logger.info(f"{len(data_sheets)} data sheets read from {file_path}")
+        return data_sheets
+
+    def _read_xlsx_sheet(self, sheet_name: str, file_path: Path, **kwargs):
+        """Read a sheet with read_xlsx, returning None if it has no header row."""
+        try:
+            return self.read_xlsx(file_path, sheet_name=sheet_name, **kwargs)
+        except ValueError:
+            self.logger.info(f"Sheet {sheet_name} of {file_path} has no header row")
+            return None
+
+    def concat_sheets(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenate the data of consecutive sheets, keeping "Time [s]" continuous.
+        When the time of a sheet starts before the end of the previous one, it is
+        assumed to restart from the start of the sheet, and the end time of the
+        previous sheet is added to it.
+
+        Args:
+            frames (List[pd.DataFrame]): The data of each sheet, with standard
+                                         headers, in order.
+
+        Returns:
+            pd.DataFrame: The concatenated data.
+        """
+        if len(frames) > 1 and all("Time [s]" in frame.columns for frame in frames):
+            end_time = None
+            for i, frame in enumerate(frames):
+                time = frame["Time [s]"].dropna()
+                if time.empty:
+                    continue
+                if end_time is not None and time.iloc[0] < end_time:
+                    frames[i] = frame = frame.assign(
+                        **{"Time [s]": frame["Time [s]"] + end_time}
+                    )
+                    self.logger.info(f"Time of sheet {i + 1} shifted by {end_time}")
+                end_time = frame["Time [s]"].dropna().iloc[-1]
+
+        return pd.concat(frames, ignore_index=True)
+
+    def read_header(self, file_path: Path):
+        """
+        Read the leading part of a file and detect its encoding.
+
+        Only the first header_window bytes are read, cut at the last complete
+        line. Each time the generator is resumed the window is doubled, until the
+        end of the file is reached. If header_window is 0 the whole file is read
+        at once.
+
+        Args:
+            file_path (Path): Path to the file to be read.
+
+        Yields:
+            tuple: The decoded contents of the window and the detected encoding.
+
+        Raises:
+            ValueError: If no encoding can be detected for the file.
+        """
+        window = self.header_window
+        contents = b""
+        with file_path.open(mode="rb") as f:
+            while True:
+                if window:
+                    contents += f.read(window - len(contents))
+                    at_eof = len(contents) < window
+                else:
+                    contents = f.read()
+                    at_eof = True
+
+                # Cut the window at the last complete line so that no keyword or
+                # multibyte character is split
+                end = len(contents) if at_eof else contents.rfind(b"\n") + 1
+                if end > 0:
+                    encoding = chardet.detect(contents[:end])["encoding"]
+                    if encoding is None:
+                        self.logger.warning(f"No encoding detected; Something is\
+                                             wrong with your input file, {file_path}")
+                        raise ValueError("Something is wrong with your input file")
+                    # The rest of the file may not be ASCII, and UTF-8 decodes
+                    # ASCII the same
+                    if encoding == "ascii" and not at_eof:
+                        encoding = "utf-8"
+                    self.logger.info(f"Encoding detected: {encoding}")
+                    self.logger.info(f"File content read up to position {end}")
+                    yield contents[:end].decode(encoding), encoding
+
+                if at_eof:
+                    return
+                window *= 2
+
     def find_words(self, file_path: Path, cycler: str = "") -> tuple:
         """
         Searches the file contents for specific keywords related to different types of
-        equipment. The search is performed iteratively for each equipment type defined
-        in self.cycler_keywords.
+        equipment. The keywords of all the equipment types defined in
+        self.cycler_keywords are searched for in a single pass, and the earliest match
+        gives the equipment type. If header_window is set, only the leading part of the
+        file is searched, growing it until a keyword is found.
 
         Args:
             file_path (str): Path to the file to be processed.
@@ -281,46 +890,10 @@ class Parser:
             self.logger.info(f"Converting Excel file, {file_path}, to CSV")
             file_path = self.convert_xlsx_to_csv(file_path)
 
-        # Read the contents of the file and detect the encoding
-        with file_path.open(mode="rb") as f:
-            contents = f.read()
-            encoding = chardet.detect(contents)["encoding"]
-            if encoding is None:
-                self.logger.warning(f"No encoding detected; Something is wrong with\
-                                     your input file, {file_path}")
-                raise ValueError("Something is wrong with your input file")
-            else:
-                self.logger.info(f"Encoding detected: {encoding}")
-                contents = contents.decode(encoding)
-                self.logger.info("File content read")
-
-        if not cycler:
-            # Iterate over each equipment type in the cycler_keywords dictionary
-            for equipment_type, keywords in self.cycler_keywords.items():
-                patterns = []
-                for phrase in keywords:
-                    # Split the phrase into words and escape each word
-                    escaped_words = [re.escape(word) for word in phrase.split()]
-                    # Join the words with '\s*' to allow for flexible whitespace
-                    pattern = r'\s*'.join(escaped_words)
-                    patterns.append(pattern)
-
-                # Compile a regex pattern for the current set of keywords/phrases
-                full_pattern = re.compile("|".join(patterns))
-
-                # Search for the keywords in the file contents
-                match = full_pattern.search(contents)
-                if match:
-                    with open(file_path, "rb") as f:
-                        # If a match is found, set the file pointer to that location
-                        # and return the position and the equipment type
-                        f.seek(match.start())
-                        self.logger.info(f"Keywords found in file, {file_path}, at\
-                                         position {match.start()}, pointer set")
-                        return (f.tell(), encoding, equipment_type)
-        # If the line number is given for the header of the line set the file pointer
-        # to that location
-        elif str(cycler).isnumeric():
+        if str(cycler).isnumeric():
+            # If the line number is given for the header of the line set the file
+            # pointer to that location
+            encoding = next(self.read_header(file_path))[1]
             cycler = int(cycler)
             with open(file_path, "rb") as f:
                 current_line = 1
@@ -332,34 +905,40 @@ class Parser:
                     current_line += 1
                 # The file pointer is now at the beginning of the desired line
                 return (f.tell(), encoding, 'cannot determine')
+
+        cycler_patterns, cycler_groups, keywords_pattern = self._compiled(
+            "cycler_keywords", self._compile_keywords
+        )
+        if not cycler:
+            pattern = keywords_pattern
         elif cycler in self.cycler_keywords.keys():
-            patterns = []
-            for phrase in self.cycler_keywords[str(cycler)]:
-                # Split the phrase into words and escape each word
-                escaped_words = [re.escape(word) for word in phrase.split()]
-                # Join the words with '\s*' to allow for flexible whitespace
-                pattern = r'\s*'.join(escaped_words)
-                patterns.append(pattern)
-            # Compile a regex pattern for the current set of keywords/phrases
-            full_pattern = re.compile("|".join(patterns))
-            # Search for the keywords in the file contents
-            match = full_pattern.search(contents)
-            if match:
-                with open(file_path, "rb") as f:
-                    # If a match is found, set the file pointer to that location and
-                    # return the position and the equipment type
-                    f.seek(match.start())
-                    self.logger.info(f"Keywords found in file, {file_path}, at position\
-                             {match.start()}, pointer set")
-                    return (f.tell(), encoding, cycler)
+            pattern = cycler_patterns[cycler]
         else:
             print("This cycler is not yet supported")
+            pattern = None
+
+        if pattern is not None:
+            for contents, encoding in self.read_header(file_path):
+                # Search for the earliest keyword of any cycler in the file contents
+                match = pattern.search(contents)
+                if match:
+                    # If a match is found, return its position and the equipment
+                    # type of the group that matched
+                    equipment_type = (
+                        cycler_groups[match.lastgroup] if not cycler
+                        else cycler
+                    )
+                    self.logger.info(f"Keywords found in file, {file_path}, at\
+                                     position {match.start()}, pointer set")
+                    return (match.start(), encoding, equipment_type)
 
         # If no match is found, raise an exception
         self.logger.warning(f"No keywords found in file, {file_path}")
         return (None, None)
 
-    def split_file(self, pointer: int, file_path: Path, save_option: str) -> tuple:
+    def split_file(
+        self, pointer: int, file_path: Path, save_option: str, stream: bool = False
+    ) -> tuple:
         """
         Split a file into two parts based on a pointer position and save them
         as separate files.
@@ -370,9 +949,15 @@ class Parser:
             file_path (str): The path to the file to split.
             save_option (str): The option for saving the split files
                                 ("save all" or "save first").
+            stream (bool, optional): If True, the data part is not read into
+                                     memory. Instead, the file is returned open
+                                     and positioned at the start of the data, and
+                                     it must be closed by the caller. Ignored for
+                                     xlsx files. Defaults to False.
 
         Returns:
-            tuple: A tuple containing the metadata part and data part as bytes.
+            tuple: A tuple containing the metadata part as bytes and the data part
+                   as bytes, or as a binary file object if stream is True.
         """
         name = file_path
 
@@ -380,28 +965,47 @@ class Parser:
         if file_path.suffix == ".xlsx":
             self.logger.info(f"file {file_path} is in xlsx format")
             file_path = file_path.parent / "converted_temporary.csv"
-
-        with file_path.open(mode="rb") as f:
-            contents = f.read()
-            # Split the file into two parts based on the pointer position
-            metadata = contents[:pointer]
-            data = contents[pointer:]
+            # The temporary file is deleted below, so it cannot be streamed
+            stream = False
 
         # Define the delimiters to check for
         delimiters = (b',', b'\t', b';', b' ')
-        self.logger.info(f"File, {file_path}, split at position {pointer}")
 
-        # Convert binary data to a list of lines for processing
-        lines = data.splitlines()
+        if stream:
+            f = file_path.open(mode="rb")
+            # Read only the metadata part, the data part is left in the file
+            metadata = f.read(pointer)
+            self.logger.info(f"File, {file_path}, split at position {pointer}")
+
+            # Skip the first line if it is empty or starts with a delimiter
+            first_line = f.readline()
+            if not first_line.strip() or first_line.lstrip().startswith(delimiters):
+                self.logger.info("Delimiters removed from first line of data")
+            else:
+                f.seek(pointer)
+            data = f
+        else:
+            with file_path.open(mode="rb") as f:
+                contents = f.read()
+                # Split the file into two parts based on the pointer position
+                metadata = contents[:pointer]
+                data = contents[pointer:]
+
+            self.logger.info(f"File, {file_path}, split at position {pointer}")
 
-        # Check if the first line is empty or starts with a delimiter
-        if lines and (not lines[0].strip() or lines[0].lstrip().startswith(delimiters)):
-            # Remove the first line
-            lines = lines[1:]
+            # Convert binary data to a list of lines for processing
+            lines = data.splitlines()
 
-        # Construct the modified data with the modified first line
-        data = b'\n'.join(lines)
-        self.logger.info("Delimiters removed from first line of data")
+            # Check if the first line is empty or starts with a delimiter
+            if lines and (
+                not lines[0].strip() or lines[0].lstrip().startswith(delimiters)
+            ):
+                # Remove the first line
+                lines = lines[1:]
+
+            # Construct the modified data with the modified first line
+            data = b'\n'.join(lines)
+            self.logger.info("Delimiters removed from first line of data")
 
         if save_option == "save all":
             self.logger.info("Save All option selected")
@@ -428,70 +1032,175 @@ class Parser:
             data_file_name = file_name + "_data" + file_ext
             data_output_path = output_dir / data_file_name
             with data_output_path.open(mode="wb") as f:
-                f.write(data)
+                if stream:
+                    # Copy the data part and rewind to its start for the reader
+                    data_start = data.tell()
+                    shutil.copyfileobj(data, f)
+                    data.seek(data_start)
+                else:
+                    f.write(data)
                 self.logger.info(f"Data saved to {data_output_path}")
 
-            if "converted_temporary.csv" in file_path.name:
-                self.logger.info(f"Deleting temporary file, {file_path}")
-                file_path.unlink()
+        if "converted_temporary.csv" in file_path.name:
+            self.logger.info(f"Deleting temporary file, {file_path}")
+            file_path.unlink()
 
-            return (metadata, data)
-
-        else:
-            if "converted_temporary.csv" in file_path.name:
-                self.logger.info(f"Deleting temporary file, {file_path}")
-                file_path.unlink()
-            return (metadata, data)
+        return (metadata, data)
 
     def read_data_to_pandas(
-        self, data: bytes, filepath: Path, encoding: str
+        self,
+        data: Union[bytes, BinaryIO],
+        filepath: Path,
+        encoding: str,
+        chunksize: int = None,
+        dtype: dict = None,
+        engine: str = "c",
     ) -> pd.DataFrame:
         """
         Read data from a bytes object into a Pandas DataFrame.
 
         Args:
-            data (bytes): The bytes object containing the data to be read.
+            data (bytes or BinaryIO): The bytes object containing the data to be read,
+                                      or a binary file positioned at the start of the
+                                      data.
             filepath (str): The original file path (determine file extension).
             encoding (str): The encoding to use for reading the data.
+            chunksize (int, optional): If given, the data is read lazily in chunks
+                                       of this number of rows. Defaults to None.
+            dtype (dict, optional): Data types of the columns, see cycler_dtypes. An
+                                    empty row or a row of units under the header
+                                    is skipped. If the data does not match them,
+                                    the types are inferred instead, for each
+                                    chunk and column with chunksize. Defaults to
+                                    None.
+            engine (str, optional): Parser engine, "c" or "pyarrow". The pyarrow
+                                    engine reads the data with several threads
+                                    and falls back to the C engine for the data
+                                    it cannot read, e.g. duplicated columns or
+                                    rows longer than the header. It is not used
+                                    with chunksize. Defaults to "c".
 
         Returns:
-            pd.DataFrame: A Pandas DataFrame containing the read data.
+            pd.DataFrame: A Pandas DataFrame containing the read data, or an
+                          iterator over DataFrames if chunksize is given.
         """
 
-        # Write data to a temporary file
-        temp_file = filepath.parent / "new_file_name"
-        with temp_file.open(mode="wb") as f:
-            self.logger.info(f"Writing data to temporary file for Pandas Import,\
-                         {temp_file}")
-            f.write(data)
+        # Read the data straight from memory or from the open file, so that no
+        # temporary file is written
+        buffer = io.BytesIO(data) if isinstance(data, bytes) else data
 
         # Determine file extension
         file_ext = filepath.suffix
+        kwargs = {"encoding": encoding, "low_memory": False, "chunksize": chunksize}
 
-        # Read file using the appropriate Pandas function based on its extension
+        # Find the appropriate Pandas function based on the file extension
         if file_ext == ".csv":
-            df = pd.read_csv(temp_file, encoding=encoding, low_memory=False)
+            reader, sep = pd.read_csv, ","
         elif file_ext == ".xlsx":
             # xlsx is converted to csv before
-            df = pd.read_csv(temp_file, encoding=encoding, low_memory=False)
+            reader, sep = pd.read_csv, ","
         elif file_ext == ".txt":
-            df = pd.read_csv(temp_file, sep="\t", encoding=encoding, low_memory=False)
+            reader, sep = pd.read_csv, "\t"
         elif file_ext == ".mpt":
-            df = pd.read_csv(temp_file, sep="\t", encoding=encoding, low_memory=False)
+            reader, sep = pd.read_csv, "\t"
         elif file_ext == ".DTA":
-            df = pd.read_table(temp_file, sep="\t", encoding=encoding, low_memory=False)
+            reader, sep = pd.read_table, "\t"
         else:
-            self.logger.warning(f"Invalid file format, {file_ext},\
-                                deleting temporary file")
-            temp_file.unlink()
+            self.logger.warning(f"Invalid file format, {file_ext}")
             raise ValueError(f"Invalid file format: {file_ext}")
 
-        # Remove the temporary file
-        self.logger.info(f"Data read, deleting temporary file, {temp_file}")
-        temp_file.unlink()
+        start = buffer.tell()
+        if dtype:
+            buffer.readline()
+            fields = buffer.readline().decode(encoding, errors="replace").split(sep)
+            buffer.seek(start)
+            # An empty row or a row of units, e.g. [V], cannot be parsed to the data
+            # types and would be dropped as NaN anyway
+            fields = pd.Series([field.strip() for field in fields])
+            if pd.to_numeric(fields, errors="coerce").isna().all():
+                kwargs["skiprows"] = [1]
+
+        if engine == "pyarrow" and chunksize is None:
+            try:
+                # The header is read here, as the pyarrow engine can neither skip
+                # the row under it nor name the columns of trailing delimiters
+                header, row = csv.reader(
+                    [
+                        buffer.readline().decode(encoding).rstrip("\r\n"),
+                        buffer.readline().decode(encoding).rstrip("\r\n"),
+                    ],
+                    delimiter=sep,
+                )
+                buffer.seek(start)
+                names = [
+                    name if name else f"Unnamed: {i}" for i, name in enumerate(header)
+                ]
+                if len(set(names)) < len(names):
+                    raise ValueError("Duplicated column names")
+                if len(row) > len(names):
+                    raise ValueError("Rows longer than the header")
+                df = reader(
+                    buffer,
+                    sep=sep,
+                    encoding=encoding,
+                    engine="pyarrow",
+                    names=names,
+                    skiprows=2 if "skiprows" in kwargs else 1,
+                    dtype={
+                        col: col_type for col, col_type in (dtype or {}).items()
+                        if col in names
+                    } or None,
+                )
+                self.logger.info(f"Data read from file, {filepath}, with pyarrow")
+                return df
+            except (ImportError, ValueError, TypeError) as e:
+                self.logger.warning(
+                    f"pyarrow engine not used for file, {filepath}: {e}"
+                )
+                buffer.seek(start)
+
+        if dtype and chunksize:
+            # A lazy reader only parses a chunk when it is iterated, so an error
+            # would escape from the loop over the chunks. The data types are
+            # applied to each chunk instead
+            chunks = reader(buffer, sep=sep, **kwargs)
+            return self._typed_chunks(chunks, dtype, filepath)
+
+        if dtype:
+            try:
+                df = reader(buffer, sep=sep, dtype=dtype, **kwargs)
+                self.logger.info(f"Data read from file, {filepath}, with data types")
+                return df
+            except (ValueError, TypeError) as e:
+                self.logger.warning(
+                    f"Data types not applied to file, {filepath}: {e}"
+                )
+                buffer.seek(start)
+                kwargs.pop("skiprows", None)
+
+        df = reader(buffer, sep=sep, **kwargs)
+        self.logger.info(f"Data read from file, {filepath}")
 
         return df
 
+    def _typed_chunks(self, chunks, dtype: dict, filepath: Path):
+        """
+        Apply the data types to each chunk read by read_data_to_pandas. A column
+        of a chunk that does not match its type, e.g. a missing value in an int
+        column, keeps the inferred type.
+        """
+        for chunk in chunks:
+            for col, col_type in dtype.items():
+                if col not in chunk.columns:
+                    continue
+                try:
+                    chunk[col] = chunk[col].astype(col_type)
+                except (ValueError, TypeError) as e:
+                    self.logger.warning(
+                        f"Data type not applied to {col} of file, {filepath}: {e}"
+                    )
+            yield chunk
+
     def change_units(
         self,
         data: pd.DataFrame,
@@ -519,11 +1228,78 @@ class Parser:
                     self.logger.info("Time converted to seconds from Run Time (h)")
                 else:
                     # Convert a string representing a time duration to seconds
-                    data[col] = pd.to_timedelta(data[col]).dt.total_seconds()
+                    data[col] = self.parse_durations(data[col])
                     self.logger.info("Time converted to seconds from string")
 
         return data
 
+    def parse_durations(
+        self,
+        durations: pd.Series,
+        sample_size: int = 1000,
+    ) -> pd.Series:
+        """
+        Convert duration strings to seconds. The format is detected from a sample
+        of the values: h:m:s, with any number of hours, is split on the separators
+        and d.hh:mm:ss or "d days hh:mm:ss" is read with a regex, both on whole
+        arrays. Other formats, numeric values and the values that do not match
+        are converted with pd.to_timedelta.
+
+        Args:
+            durations (pd.Series): The durations to convert.
+            sample_size (int, optional): Number of values used to detect the
+                                         format. Defaults to 1000.
+
+        Returns:
+            pd.Series: The durations in seconds.
+        """
+        hms = re.compile(r"\d+:\d+:\d+(\.\d*)?")
+        days_hms = (
+            r"^(?:(?P<d>\d+)(?:\.| days? ))?(?P<h>\d+):(?P<m>\d+):(?P<s>\d+(?:\.\d*)?)$"
+        )
+        try:
+            values = pa.array(durations, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pd.to_timedelta(durations).dt.total_seconds()
+
+        sample = values.drop_null()[:sample_size].to_pylist()
+        seconds = None
+        if all(hms.fullmatch(value) for value in sample):
+            parts = pc.split_pattern(pc.fill_null(values, "0:0:0"), ":")
+            # Days before the hours, e.g. 1.02:03:04, are only seen past the sample
+            if pc.all(pc.equal(pc.list_value_length(parts), 3)).as_py() and not pc.any(
+                pc.match_substring(pc.list_element(parts, 0), ".")
+            ).as_py():
+                try:
+                    parts = pc.cast(pc.list_flatten(parts), pa.float64()).to_numpy()
+                    seconds = parts.reshape(-1, 3) @ np.array([3600.0, 60.0, 1.0])
+                    seconds[values.is_null().to_numpy(zero_copy_only=False)] = np.nan
+                except pa.ArrowInvalid:
+                    seconds = None
+        if seconds is None and all(re.match(days_hms, value) for value in sample):
+            fields = pc.extract_regex(values, days_hms)
+            seconds = 0.0
+            for field, factor in [("d", 86400.0), ("h", 3600.0), ("m", 60.0),
+                                  ("s", 1.0)]:
+                # The days are optional and empty when missing
+                value = pc.replace_substring_regex(
+                    pc.struct_field(fields, field), "^$", "0"
+                )
+                seconds = seconds + factor * pc.cast(value, pa.float64()).to_numpy(
+                    zero_copy_only=False
+                )
+        if seconds is None:
+            return pd.to_timedelta(durations).dt.total_seconds()
+
+        seconds = pd.Series(seconds, index=durations.index, dtype="float64")
+        # Convert the values that do not match the format as before
+        unmatched = seconds.isna() & durations.notna()
+        if unmatched.any():
+            seconds[unmatched] = pd.to_timedelta(
+                durations[unmatched]
+            ).dt.total_seconds()
+        return seconds
+
     def change_headers(
         self,
         data: pd.DataFrame,
@@ -538,31 +1314,17 @@ class Parser:
             pd.DataFrame: A new DataFrame with column headers converted
                             according to standard_headers.
         """
-        def normalize_header(header):
-            """Normalize a header to a common format."""
-            # Lowercase and remove special characters
-            header = header.lower()
-            header = re.sub(r'\s+|\[|\]|/|,', '', header)
-            return header
-
         # Get the original column names
         original_headers = data.columns
         # Create a dictionary to store the new header names
         new_headers = {}
+        header_lookup = self._compiled("standard_headers", self._compile_headers)
         #normalize headers in the document
         for col in original_headers:
-            normalized_col = normalize_header(col)
-            matched = False
-
-            for header, values in self.standard_headers.items():
-                normalized_values = [normalize_header(value) for value in values]
-                # Check if the original header matches the mapping
-                if normalized_col in normalized_values:
-                    new_headers[col] = header
-                    matched = True
-                    break
-
-            if not matched:
+            header = header_lookup.get(self._normalize_header(col))
+            if header is not None:
+                new_headers[col] = header
+            else:
                 self.logger.info(f"No standard header found for: {col}")
 
         self.logger.info("Headers converted to standard")
@@ -578,37 +1340,78 @@ class Parser:
 
         return data
 
-    def remove_unwanted(self, data: pd.DataFrame) -> pd.DataFrame:
+    def remove_unwanted(
+        self,
+        data: pd.DataFrame,
+        na_option: str = "all",
+    ) -> pd.DataFrame:
         """
-        Remove unwanted rows and columns from a DataFrame.
+        Remove unwanted rows and columns from a DataFrame. The rows and columns to
+        keep are found first and selected at once, so that the data is copied at
+        most once.
 
         Args:
             df (pd.DataFrame): The DataFrame containing data to be processed.
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       "all" or "standard" for the columns of
+                                       standard_headers only. Defaults to "all".
 
         Returns:
             pd.DataFrame: A new DataFrame with unwanted rows and columns removed.
         """
 
         self.logger.info("Removing unwanted rows and columns")
+        rows = np.ones(len(data), dtype=bool)
         if "Step Number" in data.columns:
             # Drop rows from threshold index to the end of the DataFrame
             diff_threshold = (
                 5  # You can adjust this threshold based on the data NOT IMPLEMENTED YET
             )
-            t_index = (data["Step Number"].diff() > diff_threshold).idxmax()
-            if isinstance(t_index, int) and t_index > 0:
-                data = data.iloc[:t_index]
+            jumps = (data["Step Number"].diff() > diff_threshold).to_numpy()
+            if jumps.any():
+                rows[np.argmax(jumps):] = False
 
         # Get the column(s) with unnamed header and drop them
-        unnamed_cols = data.columns[data.columns.str.contains("^Unnamed:")]
-        data = data.drop(columns=unnamed_cols)
+        columns = ~np.asarray(data.columns.str.contains("^Unnamed:"), dtype=bool)
 
         # Drop unwanted NAs created by pre-processing
-        data = data.dropna()
-        data = data.reset_index(drop=True)
+        na_columns = data.columns[columns]
+        if na_option == "standard":
+            na_columns = [col for col in na_columns if col in self.standard_headers]
+        rows &= data[na_columns].notna().all(axis=1).to_numpy()
+
+        if not (rows.all() and columns.all()):
+            data = data.iloc[np.flatnonzero(rows), np.flatnonzero(columns)]
+        data.index = pd.RangeIndex(len(data))
         self.logger.info("Unwanted rows and columns removed")
         return data
 
+    def parse_metadata(self, metadata: str) -> dict:
+        """
+        Finds the fields of start_time_patterns in the metadata in a single pass.
+        The fields are cached by the hash of the metadata, so that the metadata of a
+        file is only searched once. Only the metadata_cache_size most recent files
+        are cached.
+
+        Args:
+            metadata (str): A string containing the experiment's metadata.
+
+        Returns:
+            dict: The first value found for each field, in the order of
+                  start_time_patterns.
+        """
+        start_time_fields = self._compiled(
+            "start_time_patterns", self._compile_start_time
+        )
+        key = hashlib.sha1(metadata.encode("utf-8", "surrogatepass")).hexdigest()
+        if key not in self._metadata_cache:
+            # The metadata of a file is searched again by each of its steps, so
+            # only the last few files are kept, the oldest one dropped first
+            if len(self._metadata_cache) >= self.metadata_cache_size:
+                del self._metadata_cache[next(iter(self._metadata_cache))]
+            self._metadata_cache[key] = self._find_fields(metadata, start_time_fields)
+        return self._metadata_cache[key]
+
     def find_start_time(self, metadata: str) -> str:
         """
         Searches the provided metadata for a start time of an experiment using various
@@ -622,55 +1425,63 @@ class Parser:
             str or None: The extracted start time as a string if a match is found;
                          otherwise, None.
         """
-        # List of regular expression patterns for matching start time/date in metadata.
-        # Each pattern accounts for a specific format that the start time/date might be
-        # recorded in.
-        patterns = [
-            # Matches Start Time
-            r"Start Time,?(\d+/\d+/\d+ \d+:\d+:\d+ [APM]+)",
-            # Matches Test Date
-            r"Test Date:?,?\"?(\d+/\d+/\d+ \d+:\d+:\d+)",
-            # Matches Start date
-            r"Start date:, (\d+ \w+ \d+)",
-            # Matches Start time with timezone offset
-            r"Start time:, (\d+:\d+:\d+ \+\d+:\d+)",
-            # Matches Technique started on
-            r"Technique started on : (\d+/\d+/\d+ \d+:\d+:\d+)",
-            # Matches DATE with tab-separated LABEL
-            r"DATE\tLABEL\t(\d+/\d+/\d+)",
-            # Matches DATE with tab-separated LABEL
-            r"TIME\tLABEL\t(\d+:\d+:\d+)",
-            # Matches Date of Test
-            r"Date of Test:?,?\"?(\d+ \w+ \d+, \d+:\d+:\d+ [APM]+)",
-            # Matches Started
-            r"Started,(\d+/\d+/\d+ \d+:\d+)",
-            # Matches Modify on
-            r"Modify on : (\d+/\d+/\d+ \d+:\d+)",
-            # Matches Acquisition started on
-            r"Acquisition started on : (\d+/\d+/\d+ \d+:\d+:\d+)",
-            # Matches Date in ISO format
-            r"Date,(\d+-\d+-\d+ \d+:\d+:\d+),",
-            # Matches Time
-            r"Time,(\d+:\d+:\d+),"
-        ]
-
-        # Iterate over each pattern, searching for a match in the metadata.
-        for pattern in patterns:
-            match = re.search(pattern, metadata, re.IGNORECASE)
-            if match:
-                # If a match is found, return the matched group, which is the date/time.
-                self.logger.info("Date and time found in metadata.")
-                return match.group(1)
+        # The first field found, in the order of start_time_patterns
+        for value in self.parse_metadata(metadata).values():
+            self.logger.info("Date and time found in metadata.")
+            return value
 
         # If no matches are found, return an empty string.
         self.logger.warning("Date and time not found in metadata.")
         return ""
 
+    def parse_start_time(self, metadata: str) -> datetime:
+        """
+        Finds the start time of an experiment in the metadata and converts it to a
+        datetime, combining the date and time when they are given separately.
+
+        Args:
+            metadata (str): A string containing the experiment's metadata.
+
+        Returns:
+            datetime: The start time of the experiment.
+
+        Raises:
+            ValueError: If the start time format is not recognized or cannot be found
+                        in metadata.
+        """
+        # Attempt to find start time from metadata.
+        start_time_str = self.find_start_time(metadata)
+
+        # Additional logic for combining separate date and time entries in metadata.
+        # This part is crucial for cases where the date and time are provided
+        # separately and need to be concatenated.
+        fields = self.parse_metadata(metadata)
+        for date_field, time_field in [("Start date", "Start time"), ("DATE", "TIME")]:
+            if start_time_str == fields.get(date_field) and time_field in fields:
+                start_time_str += " " + fields[time_field]  # Combine date and time.
+
+        # Convert start time string to datetime object using various potential formats.
+        for fmt in ("%d/%m/%Y %H:%M:%S", "%d %B %Y %H:%M:%S", "%Y-%m-%d %H:%M:%S",
+                    "%d/%m/%Y %H:%M", "%d %B %Y, %I:%M:%S %p"):
+            try:
+                start_time = datetime.strptime(start_time_str, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            self.logger.warning("Start time format not recognized or start time not\
+                                 found in metadata.")
+            raise ValueError("Start time format not recognized or start time not found\
+                              in metadata.")
+
+        return start_time
+
     def absolute_time(
             self,
             metadata: Union[bytes, str],
             data: pd.DataFrame,
-            encoding: str
+            encoding: str,
+            time_offset: float = 0.0,
     ) -> pd.DataFrame:
         """
         Adds an 'Absolute Time [s]' column to the provided DataFrame based on the
@@ -686,6 +1497,9 @@ class Parser:
                                  start of the experiment.
             encoding (str): Encoding of the metadata if provided as bytes. Default is
                             'utf-8'.
+            time_offset (float, optional): Time added to the cumulative time, used
+                                           when the data is processed in chunks.
+                                           Defaults to 0.
 
         Returns:
             pd.DataFrame: The input DataFrame with an added 'Absolute Time [s]' column.
@@ -704,50 +1518,74 @@ class Parser:
             metadata = metadata.decode(encoding)
         metadata = str(metadata)
 
-        # Attempt to find start time from metadata.
-        start_time_str = self.find_start_time(metadata)
+        start_time = self.parse_start_time(metadata)
 
-        # Additional logic for combining separate date and time entries in metadata.
-        # This part is crucial for cases where the date and time are provided
-        # separately and need to be concatenated.
-        combined_patterns = [
-            (r"Start date:, (\d+ \w+ \d+)", r"Start time:, (\d+:\d+:\d+ \+\d+:\d+)"),
-            (r"DATE\tLABEL\t(\d+/\d+/\d+)", r"TIME\tLABEL\t(\d+:\d+:\d+)"),
-            (r"Date,(\d+-\d+-\d+ \d+:\d+:\d+,)", r"Time,(\d+:\d+:\d+,)")
-        ]
-        for date_pat, time_pat in combined_patterns:
-            if re.search(date_pat, metadata) and re.search(time_pat, metadata):
-                date_str = self.find_start_time(date_pat + metadata.split(date_pat)[-1])
-                time_str = self.find_start_time(time_pat + metadata.split(time_pat)[-1])
-                if date_str and time_str:
-                    start_time_str += " " + time_str  # Combine date and time.
-
-        # Convert start time string to datetime object using various potential formats.
-        for fmt in ("%d/%m/%Y %H:%M:%S", "%d %B %Y %H:%M:%S", "%Y-%m-%d %H:%M:%S",
-                    "%d/%m/%Y %H:%M", "%d %B %Y, %I:%M:%S %p"):
-            try:
-                start_time = datetime.strptime(start_time_str, fmt)
-                break
-            except ValueError:
-                continue
-        else:
-            self.logger.warning("Start time format not recognized or start time not\
-                                 found in metadata.")
-            raise ValueError("Start time format not recognized or start time not found\
-                              in metadata.")
-
-        # Calculate and add 'Absolute Time [s]' to the DataFrame.
-        data["Absolute Time [s]"] = data["Time [s]"].cumsum().apply(
-            lambda x: start_time + timedelta(seconds=x))
+        # Calculate and add 'Absolute Time [s]' to the DataFrame, as a datetime64
+        # column computed for all the rows at once from the elapsed nanoseconds.
+        elapsed = ((data["Time [s]"].cumsum() + time_offset) * 1e9).round()
+        elapsed = elapsed.to_numpy().astype("timedelta64[ns]")
+        data["Absolute Time [s]"] = np.datetime64(start_time, "ns") + elapsed
         self.logger.info("Absolute time added to the data frame")
 
         return data
 
-    def sanity_check(self, data: pd.DataFrame) -> int:
+    def extract_metadata(
+            self,
+            metadata: Union[bytes, str],
+            encoding: str,
+            equipment_type: str,
+    ) -> dict:
+        """
+        Extracts a record of the metadata of a file: the cycler, the start time and
+        the fields of metadata_fields for the cycler, found in a single pass.
+        The values of numeric_metadata_fields are converted to int or float, with
+        None for a value that is not finite, and the other values are kept as
+        strings.
+
+        Args:
+            metadata (bytes or str): Metadata of the file.
+            encoding (str): Encoding of the metadata if provided as bytes.
+            equipment_type (str): Cycler of the file, as found by find_words.
+
+        Returns:
+            dict: The metadata record, with None as start time if it is not found.
+        """
+        if isinstance(metadata, bytes):
+            metadata = metadata.decode(encoding)
+        metadata = str(metadata)
+
+        record = {"equipment_type": equipment_type}
+        try:
+            record["start_time"] = self.parse_start_time(metadata)
+        except ValueError:
+            record["start_time"] = None
+        cycler_fields = self._compiled("metadata_fields", self._compile_cycler_fields)
+        if equipment_type in cycler_fields:
+            fields = self._find_fields(metadata, cycler_fields[equipment_type])
+            for field, value in fields.items():
+                value = value.strip()
+                if field in self.numeric_metadata_fields:
+                    for convert in (int, float):
+                        try:
+                            value = convert(value)
+                            break
+                        except ValueError:
+                            continue
+                    # NaN and infinity cannot be saved as JSON
+                    if isinstance(value, float) and not np.isfinite(value):
+                        value = None
+                record[field] = value
+        self.logger.info("Metadata record extracted")
+        return record
+
+    def sanity_check(self, data: pd.DataFrame, check_option: str = "full") -> dict:
         """
         Performs a sanity check on the provided DataFrame to determine if it is a
         normal experiment or a frequency experiment and ensures the presence of
-        necessary data.
+        necessary data. The voltages of three electrode experiments are checked
+        with check_three_electrode, and the rows where they are inconsistent are
+        reported rather than raised, so that a corrupted channel can be triaged
+        from the report.
         Required Columns:
             Normal experiments (flexible): Either 'Voltage [V]' or 'Working electrode
                                            potential [V]', along with 'Current [A]' and
@@ -757,14 +1595,19 @@ class Parser:
         Args:
             data (pd.DataFrame): The DataFrame to be checked. It should contain data
                                  from experiments.
+            check_option (str, optional): Option for the three electrode check,
+                                          "full", "sample" or "" to skip it, see
+                                          check_three_electrode. Defaults to
+                                          "full".
 
         Returns:
-            int: A confirmation 0 integer saying the sanity check has passed.
+            dict: The report of the check, with the type of experiment
+                  ("normal" or "frequency"), the report of the three electrode
+                  check, or None if it was not run, and whether the check passed.
 
         Raises:
             ValueError: If any required columns are missing based on the determined
-                        experiment type. or if the three electrode data doesn't make
-                        sense working - counter = voltage
+                        experiment type.
         """
         check_normal = ["Current [A]", "Time [s]"]
         check_either_normal = [("Voltage [V]", "Working electrode potential [V]",
@@ -803,75 +1646,922 @@ class Parser:
                 raise ValueError(f"Your data is missing the following columns for\
                                  normal experiments: {missing_cols}")
 
-        # Check that the thre electrode voltage data makes sense
+        report = {
+            "experiment": "frequency" if is_freq_experiment else "normal",
+            "three_electrode": None,
+            "passed": True,
+        }
+        # Check that the three electrode voltage data makes sense
         three_el = ["Working electrode potential [V]",
                     "Counter electrode potential [V]",
                     "Voltage [V]"]
-        if all(elem in data.columns for elem in three_el):
-            check = (data["Working electrode potential [V]"].abs() -
-                     data["Counter electrode potential [V]"].abs()).abs()
-            if not (check - data["Voltage [V]"]).abs().lt(0.02).all():
-                self.logger.warning("Voltage data in three electrode experiment is\
-                                    corrupted")
-                raise ValueError("Your voltage data is corrupted")
+        if check_option and all(elem in data.columns for elem in three_el):
+            report["three_electrode"] = self.check_three_electrode(data, check_option)
+            report["passed"] = report["three_electrode"]["passed"]
 
-        self.logger.info("Sanity check passed")
-        return 0
+        if report["passed"]:
+            self.logger.info("Sanity check passed")
+        return report
 
-    def data_importer(
+    def check_three_electrode(
         self,
-        path_or_file: Path,
+        data: pd.DataFrame,
+        check_option: str = "full",
+        tolerance: float = 0.02,
+        sample_blocks: int = 10,
+        block_size: int = 1000,
+        seed: Union[int, None] = None,
+    ) -> dict:
+        """
+        Check that the voltages of a three electrode experiment are consistent,
+        |working - counter| = voltage, within a tolerance.
+
+        Args:
+            data (pd.DataFrame): The DataFrame with the working electrode, counter
+                                 electrode and cell voltages.
+            check_option (str, optional): "full" checks every row, "sample" only
+                                          randomly chosen blocks of rows, for a
+                                          fast pass over large files. Defaults to
+                                          "full".
+            tolerance (float, optional): Largest deviation allowed, in V. Defaults
+                                         to 0.02.
+            sample_blocks (int, optional): Number of blocks checked in "sample"
+                                           mode. Defaults to 10.
+            block_size (int, optional): Number of rows of each block. Defaults to
+                                        1000.
+            seed (int, optional): Seed of the random choice of blocks. Defaults to
+                                  None.
+
+        Returns:
+            dict: The mode of the check, the number of rows checked, the number of
+                  violations, the (first, last) row positions of each run of
+                  consecutive violations, the largest deviation, or None if no
+                  deviation could be computed, and whether the check passed.
+                  Missing voltages count as violations.
+
+        Raises:
+            ValueError: If check_option is not "full" or "sample".
+        """
+        if check_option not in ["full", "sample"]:
+            self.logger.warning(f"Unsupported check option: {check_option}")
+            raise ValueError(f"Unsupported check option: {check_option}")
+
+        rows = np.arange(len(data))
+        n_blocks = -(-len(data) // block_size)
+        if check_option == "sample" and sample_blocks < n_blocks:
+            rng = np.random.default_rng(seed)
+            blocks = np.sort(rng.choice(n_blocks, sample_blocks, replace=False))
+            rows = (blocks[:, None] * block_size + np.arange(block_size)).ravel()
+            rows = rows[rows < len(data)]
+
+        working, counter, voltage = (
+            data[col].to_numpy(dtype=float)[rows]
+            for col in ["Working electrode potential [V]",
+                        "Counter electrode potential [V]",
+                        "Voltage [V]"]
+        )
+        residual = np.abs(np.abs(np.abs(working) - np.abs(counter)) - voltage)
+        # NaN residuals fail the comparison, so missing voltages are violations
+        violating = rows[~(residual < tolerance)]
+
+        # Runs of consecutive violating rows are reported as ranges
+        breaks = np.flatnonzero(np.diff(violating) != 1)
+        starts = violating[np.r_[0, breaks + 1]] if len(violating) else []
+        ends = violating[np.r_[breaks, len(violating) - 1]] if len(violating) else []
+        report = {
+            "mode": check_option,
+            "checked": len(rows),
+            "violations": len(violating),
+            "ranges": [(int(start), int(end)) for start, end in zip(starts, ends)],
+            "max_residual": (
+                float(np.nanmax(residual)) if np.isfinite(residual).any() else None
+            ),
+            "passed": len(violating) == 0,
+        }
+        if not report["passed"]:
+            self.logger.warning(
+                f"Voltage data in three electrode experiment is corrupted in "
+                f"{report['violations']} of {report['checked']} checked rows"
+            )
+        return report
+
+    @staticmethod
+    def _merge_check_reports(first: dict, second: dict, offset: int) -> dict:
+        """
+        Merge the sanity check reports of two consecutive parts of a file, the
+        second one starting at the row position offset. The first report can be
+        None.
+        """
+        if first is None:
+            return dict(second)
+        merged = dict(first, passed=first["passed"] and second["passed"])
+        if second["three_electrode"] is None:
+            return merged
+        checks = second["three_electrode"]
+        ranges = [(start + offset, end + offset) for start, end in checks["ranges"]]
+        if first["three_electrode"] is not None:
+            previous = first["three_electrode"]
+            # A run of violations can continue across the two parts
+            if previous["ranges"] and ranges and \
+                    previous["ranges"][-1][1] + 1 == ranges[0][0]:
+                ranges[0] = (previous["ranges"][-1][0], ranges[0][1])
+                ranges = previous["ranges"][:-1] + ranges
+            else:
+                ranges = previous["ranges"] + ranges
+            checks = dict(
+                checks,
+                checked=previous["checked"] + checks["checked"],
+                violations=previous["violations"] + checks["violations"],
+                max_residual=max(
+                    (residual for residual in
+                     (previous["max_residual"], checks["max_residual"])
+                     if residual is not None),
+                    default=None,
+                ),
+                passed=previous["passed"] and checks["passed"],
+            )
+        merged["three_electrode"] = dict(checks, ranges=ranges)
+        return merged
+
+    def cache_key(self, file: Path, **options) -> str:
+        """
+        Get the key of the cached import of a file. It changes with the content of
+        the file, see file_fingerprint, the configuration of the parser and the
+        import options.
+
+        Args:
+            file (pathlib.Path): Path to the file containing battery data.
+            **options: The options of the import.
+
+        Returns:
+            str: The cache key of the file.
+        """
+        digest = hashlib.sha1(file_fingerprint(file).encode())
+        digest.update(self._config_key(**options).encode())
+        return digest.hexdigest()
+
+    def _config_key(self, **options) -> str:
+        """
+        Get a key of the configuration of the parser and the import options.
+        """
+        config = [
+            __version__,
+            self.cycler_keywords,
+            self.standard_units,
+            self.standard_time,
+            self.standard_headers,
+            self.cycler_dtypes,
+            self.start_time_patterns,
+            self.metadata_fields,
+            self.header_window,
+            sorted(options.items()),
+        ]
+        return hashlib.sha1(repr(config).encode()).hexdigest()
+
+    def _import_file(
+        self,
+        file: Path,
         cycler: str = "",
         file_type: str = "csv",
         save_option: str = "save",
         state_option: str = "",
-        print_option: str = "",
-    ) -> pd.DataFrame:
+        sheets: Union[str, List[str]] = "active",
+        sheet_workers: int = 1,
+        engine: str = "c",
+        na_option: str = "all",
+        check_option: str = "full",
+        cache_option: str = "",
+    ) -> tuple:
         """
-        Import, process, and optionally save and/or print battery data.
+        Import, process, and optionally save the battery data of a single file.
 
         Args:
-            path_or_file (pathlib.path): Path to a directory or file containing battery
-                                data.
+            file (pathlib.Path): Path to the file containing battery data.
+            cycler (str, optional): Cycler or header line number passed to
+                                    find_words. Defaults to "".
             file_type (str, optional): The type of file to save as. Defaults to
                                         "csv".
             save_option (str, optional): Option for saving files. Defaults to
                                         "save".
             state_option (str, optional): Option to add battery state labels.
                                             Defaults to "".
-            print_option (str, optional): Option for printing data and plots.
-                                            Defaults to "".
+            sheets (str or List[str], optional): Sheets of an xlsx file to import,
+                                                 see read_xlsx_sheets. Defaults to
+                                                 "active".
+            sheet_workers (int, optional): Number of processes used to read the
+                                           sheets of an xlsx file. Defaults to 1.
+            engine (str, optional): Parser engine, see read_data_to_pandas. Defaults
+                                    to "c".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see sanity_check. Defaults to "full".
+            cache_option (str, optional): Option to use the cached import of the
+                                          file, "yes" to use it. Defaults to "".
+
+        Returns:
+            tuple: The processed DataFrame, the list of warnings raised while
+                   processing the file, its metadata record and its sanity check
+                   report, or None if the check could not run.
         """
-        self.logger.info("Importing data")
-        for file in self.look_for_files(path_or_file):
-            # Process each file
-            self.logger.info(f"Processing file, {file}")
+        if cache_option == "yes":
+            key = self.cache_key(
+                file,
+                cycler=cycler,
+                file_type=file_type,
+                save_option=save_option,
+                state_option=state_option,
+                sheets=sheets,
+                engine=engine,
+                na_option=na_option,
+                check_option=check_option,
+            )
+            cached = load_cache(file, key, self.logger.name)
+            if cached is not None:
+                return cached
+
+        warnings = []
+        self.logger.info(f"Processing file, {file}")
+        if file.suffix == ".xlsx":
+            # Excel files are read straight into a DataFrame, one per sheet
+            sheet_data = self.read_xlsx_sheets(
+                file, cycler, save_option, sheets, sheet_workers
+            )
+            metadata, _, equipment_type = sheet_data[0]
+            encoding = "utf-8"
+            data = self.concat_sheets([
+                self.change_headers(self.change_units(data))
+                for _, data, _ in sheet_data
+            ])
+        else:
             pointer, encoding, equipment_type = self.find_words(file, cycler)
             self.logger.info(f"Pointer and encoding found for file, {file}")
-            metadata, data = self.split_file(pointer, file, save_option)
+            metadata, data_file = self.split_file(
+                pointer, file, save_option, stream=True
+            )
             self.logger.info(f"File, {file}, split into metadata and data")
-            data = self.read_data_to_pandas(data, file, encoding)
+            with data_file:
+                data = self.read_data_to_pandas(
+                    data_file,
+                    file,
+                    encoding,
+                    dtype=self.cycler_dtypes.get(equipment_type),
+                    engine=engine,
+                )
             data = self.change_units(data)
             data = self.change_headers(data)
-            data = self.remove_unwanted(data)
+        data = self.remove_unwanted(data, na_option)
+        sanity_report = None
+        try:
+            data = self.absolute_time(metadata, data, encoding)
+            sanity_report = self.sanity_check(data, check_option)
+        except Exception as e:
+            self.logger.warning(f"An error occurred: {e} when processing {file}")
+            warnings.append(str(e))
+        if sanity_report is not None and not sanity_report["passed"]:
+            warnings.append("Your voltage data is corrupted")
+        self.logger.info(f"Data imported from file, {file}")
+        metadata_record = self.extract_metadata(metadata, encoding, equipment_type)
+        if state_option == "yes":
+            try:
+                data = add_state_label(data)
+                self.logger.info(f"State labels added to file, {file}")
+            except Exception as e:
+                self.logger.warning(
+                    f"An error occurred: {e} when processing {file}"
+                )
+                warnings.append(str(e))
+        # Save the file if the option is set to 'save all' or 'save'
+        if save_option in ["save all", "save"]:
+            save_file(data, file_type, file)
+            save_metadata(metadata_record, file)
+            self.logger.info(f"File, {file}, saved")
+
+        if cache_option == "yes":
+            save_cache(
+                (data, warnings, metadata_record, sanity_report),
+                file,
+                key,
+                self.logger.name,
+            )
+        return data, warnings, metadata_record, sanity_report
+
+    @staticmethod
+    def _new_progress() -> dict:
+        """
+        Start the progress carried from chunk to chunk of a file by
+        _process_chunk: the last step number, the time and number of rows of the
+        chunks processed, the warnings raised, the sanity check report, whether
+        the absolute time could be added, whether the checks passed and whether
+        the end of the data was reached.
+        """
+        return {
+            "last_step": np.nan,
+            "time_offset": 0.0,
+            "rows": 0,
+            "warnings": [],
+            "sanity": None,
+            "time_added": True,
+            "checks_passed": True,
+            "stopped": False,
+        }
+
+    def _process_chunk(
+        self,
+        data: pd.DataFrame,
+        file: Path,
+        metadata: bytes,
+        encoding: str,
+        progress: dict,
+        state_option: str = "",
+        na_option: str = "all",
+        check_option: str = "full",
+    ) -> pd.DataFrame:
+        """
+        Process a chunk of the data of a file, continuing from the chunks before
+        it. The progress, see _new_progress, is updated in place.
+
+        Args:
+            data (pd.DataFrame): The chunk of data, as read by read_data_to_pandas.
+            file (pathlib.Path): Path to the file containing battery data.
+            metadata (bytes): The metadata part of the file.
+            encoding (str): The encoding of the file.
+            progress (dict): The progress of the chunks before this one.
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see sanity_check. Defaults to "full".
+
+        Returns:
+            pd.DataFrame: The processed chunk.
+        """
+        warnings = progress["warnings"]
+        data = self.change_units(data)
+        data = self.change_headers(data)
+
+        # Drop the rows after a jump in step number, as remove_unwanted does for the
+        # whole file, including a jump between chunks
+        if "Step Number" in data.columns and len(data):
+            steps = data["Step Number"].to_numpy(dtype=float)
+            jumps = np.diff(steps, prepend=progress["last_step"]) > 5
+            progress["last_step"] = steps[-1]
+            if jumps.any():
+                data = data.iloc[:np.argmax(jumps)]
+                progress["stopped"] = True
+        data = self.remove_unwanted(data, na_option)
+
+        # The metadata and columns are the same for every chunk, so a step is not
+        # repeated once it has failed. The absolute time is still added after the
+        # checks failed, so that every chunk has the same columns
+        if progress["time_added"]:
             try:
-                data = self.absolute_time(metadata, data, encoding)
-                self.sanity_check(data)
+                data = self.absolute_time(
+                    metadata, data, encoding, progress["time_offset"]
+                )
             except Exception as e:
                 self.logger.warning(f"An error occurred: {e} when processing {file}")
-            self.logger.info(f"Data imported from file, {file}")
-            if state_option == "yes":
-                try:
-                    data = add_state_label(data)
-                    self.logger.info(f"State labels added to file, {file}")
-                except Exception as e:
+                warnings.append(str(e))
+                progress["time_added"] = False
+        if progress["time_added"] and progress["checks_passed"]:
+            try:
+                report = self.sanity_check(data, check_option)
+            except Exception as e:
+                self.logger.warning(f"An error occurred: {e} when processing {file}")
+                warnings.append(str(e))
+                progress["checks_passed"] = False
+            else:
+                progress["sanity"] = self._merge_check_reports(
+                    progress["sanity"], report, progress["rows"]
+                )
+        if "Time [s]" in data.columns:
+            progress["time_offset"] += data["Time [s]"].sum()
+        if state_option == "yes":
+            try:
+                data = add_state_label(data)
+            except Exception as e:
+                if str(e) not in warnings:
                     self.logger.warning(
                         f"An error occurred: {e} when processing {file}"
                     )
-            # Save the file if the option is set to 'save all' or 'save'
-            if save_option in ["save all", "save"]:
-                save_file(data, file_type, file)
-                self.logger.info(f"File, {file}, saved")
+                    warnings.append(str(e))
+        progress["rows"] += len(data)
+        return data
+
+    @staticmethod
+    def _progress_warnings(progress: dict) -> tuple:
+        """
+        Get the warnings and the sanity check report of the chunks of a file.
+        """
+        warnings = list(progress["warnings"])
+        sanity_report = progress["sanity"]
+        if sanity_report is not None and not sanity_report["passed"]:
+            warnings.append("Your voltage data is corrupted")
+        return warnings, sanity_report
+
+    def _import_file_chunked(
+        self,
+        file: Path,
+        cycler: str = "",
+        chunksize: int = 100000,
+        state_option: str = "",
+        na_option: str = "all",
+        check_option: str = "full",
+    ) -> tuple:
+        """
+        Import and process the battery data of a single file in chunks, appending
+        each processed chunk to a parquet file in the processed folder.
+
+        Args:
+            file (pathlib.Path): Path to the file containing battery data.
+            cycler (str, optional): Cycler or header line number passed to
+                                    find_words. Defaults to "".
+            chunksize (int, optional): Number of rows read and processed at once.
+                                       Defaults to 100000.
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see sanity_check. Defaults to "full".
+
+        Returns:
+            tuple: The path to the parquet file, the list of warnings raised while
+                   processing the file, its metadata record and its sanity check
+                   report, merged over the chunks.
+        """
+        if file.suffix == ".xlsx":
+            self.logger.warning(f"Chunked import of xlsx file, {file}, not supported")
+            raise ValueError(f"Chunked import is not supported for xlsx files: {file}")
+
+        self.logger.info(f"Processing file, {file}, in chunks of {chunksize} rows")
+        # The header is found once, then only the data part is read in chunks
+        pointer, encoding, equipment_type = self.find_words(file, cycler)
+        metadata, data_file = self.split_file(pointer, file, "", stream=True)
+
+        output_dir = file.parent / "processed"
+        output_dir.mkdir(exist_ok=True)
+        output_path = output_dir / f"{file.name.split('.')[0]}_cleaned_data.parquet"
+
+        writer = None
+        progress = self._new_progress()
+        with data_file:
+            try:
+                for data in self.read_data_to_pandas(
+                    data_file,
+                    file,
+                    encoding,
+                    chunksize=chunksize,
+                    dtype=self.cycler_dtypes.get(equipment_type),
+                ):
+                    data = self._process_chunk(
+                        data,
+                        file,
+                        metadata,
+                        encoding,
+                        progress,
+                        state_option,
+                        na_option,
+                        check_option,
+                    )
+
+                    # The first chunk sets the schema of the parquet file, the types
+                    # pandas inferred for the later chunks are cast to it
+                    table = pa.Table.from_pandas(data, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, table.schema)
+                    else:
+                        table = table.cast(writer.schema)
+                    writer.write_table(table)
+                    self.logger.info(f"{len(data)} rows of {file} written")
+                    if progress["stopped"]:
+                        break
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        if writer is None:
+            self.logger.warning(f"No data found in file, {file}")
+            raise ValueError(f"No data found in file: {file}")
+        warnings, sanity_report = self._progress_warnings(progress)
+        self.logger.info(f"Data imported from file, {file}, to {output_path}")
+        metadata_record = self.extract_metadata(metadata, encoding, equipment_type)
+        save_metadata(metadata_record, file)
+        return output_path, warnings, metadata_record, sanity_report
+
+    def _import_file_incremental(
+        self,
+        file: Path,
+        cycler: str = "",
+        state_option: str = "",
+        na_option: str = "all",
+        check_option: str = "full",
+    ) -> tuple:
+        """
+        Import and process the rows appended to a file since its last incremental
+        import, extending the cached data of the file. The header, encoding,
+        equipment type and metadata found on the first import are reused, and
+        only the complete lines after the byte offset reached so far are parsed.
+        The file is imported again from the start if it was replaced or the
+        configuration of the parser or the options changed.
+
+        Args:
+            file (pathlib.Path): Path to the file containing battery data.
+            cycler (str, optional): Cycler or header line number passed to
+                                    find_words. Defaults to "".
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see sanity_check. Defaults to "full".
+
+        Returns:
+            tuple: The processed DataFrame of all the rows imported so far, the list
+                   of warnings raised while processing the file, its metadata
+                   record and its sanity check report.
+        """
+        if file.suffix == ".xlsx":
+            self.logger.warning(
+                f"Incremental import of xlsx file, {file}, not supported"
+            )
+            raise ValueError(
+                f"Incremental import is not supported for xlsx files: {file}"
+            )
+
+        # The state is kept apart from the cached imports, which save_cache
+        # replaces
+        data_path, state_path = cache_paths(file, "state", "incremental")
+        config_key = self._config_key(
+            cycler=cycler,
+            state_option=state_option,
+            na_option=na_option,
+            check_option=check_option,
+        )
+        state, data = None, None
+        if data_path.exists() and state_path.exists():
+            state = pd.read_pickle(state_path)
+            with file.open("rb") as f:
+                head = f.read(state["data_start"])
+            # The rows already imported must not have changed
+            if (
+                state["config_key"] != config_key
+                or file.stat().st_size < state["offset"]
+                or hashlib.sha1(head).hexdigest() != state["head"]
+            ):
+                self.logger.info(f"File, {file}, changed, importing it again")
+                state = None
+            else:
+                data = pd.read_parquet(data_path)
+
+        if state is None:
+            # The header is found once, on the first import of the file
+            pointer, encoding, equipment_type = self.find_words(file, cycler)
+            metadata, data_file = self.split_file(pointer, file, "", stream=True)
+            with data_file:
+                header = data_file.readline()
+                data_start = data_file.tell()
+                data_file.seek(0)
+                head = data_file.read(data_start)
+            state = {
+                "config_key": config_key,
+                "encoding": encoding,
+                "equipment_type": equipment_type,
+                "metadata": metadata,
+                "header": header,
+                "data_start": data_start,
+                "head": hashlib.sha1(head).hexdigest(),
+                "offset": data_start,
+                "text_columns": None,
+                "progress": self._new_progress(),
+            }
+
+        with file.open("rb") as f:
+            f.seek(state["offset"])
+            appended = f.read()
+        # A line still being written is left for the next import
+        appended = appended[:appended.rfind(b"\n") + 1]
+        progress = state["progress"]
+        if appended and not progress["stopped"]:
+            self.logger.info(f"Processing {len(appended)} bytes appended to {file}")
+            # The columns read as text on the first import stay text, as when the
+            # whole file is read at once
+            dtype = dict(self.cycler_dtypes.get(state["equipment_type"]) or {})
+            dtype.update(dict.fromkeys(state["text_columns"] or [], str))
+            new_data = self.read_data_to_pandas(
+                state["header"] + appended, file, state["encoding"], dtype=dtype
+            )
+            if state["text_columns"] is None:
+                state["text_columns"] = [
+                    col for col, col_type in new_data.dtypes.items()
+                    if pd.api.types.is_string_dtype(col_type)
+                ]
+            new_data = self._process_chunk(
+                new_data,
+                file,
+                state["metadata"],
+                state["encoding"],
+                progress,
+                state_option,
+                na_option,
+                check_option,
+            )
+            if data is None:
+                data = new_data
+            else:
+                # The types inferred for the new rows follow the data imported,
+                # with the categories of both
+                dtypes = {}
+                for col in data.columns.intersection(new_data.columns):
+                    dtypes[col] = data[col].dtype
+                    if isinstance(dtypes[col], pd.CategoricalDtype):
+                        categories = pd.Index(new_data[col].dropna().unique())
+                        if not categories.isin(dtypes[col].categories).all():
+                            dtypes[col] = pd.CategoricalDtype(
+                                dtypes[col].categories.union(categories)
+                            )
+                            data[col] = data[col].cat.set_categories(
+                                dtypes[col].categories
+                            )
+                new_data = new_data.astype(dtypes, errors="ignore")
+                data = pd.concat([data, new_data], ignore_index=True)
+
+        if data is None:
+            self.logger.warning(f"No data found in file, {file}")
+            raise ValueError(f"No data found in file: {file}")
+        if appended:
+            state["offset"] += len(appended)
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            data.to_parquet(data_path, index=False)
+            pd.to_pickle(state, state_path)
+        self.logger.info(
+            f"Data imported from file, {file}, up to byte {state['offset']}"
+        )
+
+        warnings, sanity_report = self._progress_warnings(progress)
+        metadata_record = self.extract_metadata(
+            state["metadata"], state["encoding"], state["equipment_type"]
+        )
+        return data, warnings, metadata_record, sanity_report
+
+    def _run_in_pool(self, function, items: list, workers: int, **kwargs):
+        """
+        Call a function on several items at once in a pool of processes. The
+        records logged by the workers are handled by the logger of this process.
+
+        Args:
+            function (callable): The function to call on each item.
+            items (list): The items passed as first argument to the function.
+            workers (int): Maximum number of worker processes.
+            **kwargs: Options passed to the function.
+
+        Yields:
+            tuple: Each item and the future of its call, as soon as it is done.
+        """
+        context = multiprocessing.get_context()
+        queue = context.Queue()
+        listener = logging.handlers.QueueListener(queue, ForwardHandler())
+        listening = False
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=init_worker_logger,
+                initargs=(queue, self.logger.name, self.logger.getEffectiveLevel()),
+            ) as executor:
+                futures = {
+                    executor.submit(function, item, **kwargs): item for item in items
+                }
+                # Start listening once all the workers have been created
+                listener.start()
+                listening = True
+                for future in as_completed(futures):
+                    yield futures[future], future
+        finally:
+            # Stopping the listener handles the records still in the queue
+            if listening:
+                listener.stop()
+
+    def _import_files_in_pool(self, files: List[Path], workers: int, **kwargs):
+        """
+        Run _import_file on several files at once in a pool of processes.
+
+        Args:
+            files (List[pathlib.Path]): Paths to the files containing battery data.
+            workers (int): Maximum number of worker processes.
+            **kwargs: Options passed to _import_file.
+
+        Yields:
+            tuple: The path and the processed DataFrame of each file imported
+                   successfully, as soon as it is ready.
+        """
+        for file, future in self._run_in_pool(
+            self._import_file, files, workers, **kwargs
+        ):
+            try:
+                data, warnings, metadata, sanity = future.result()
+            except Exception as e:
+                # A failing file does not stop the others
+                self.logger.error(f"An error occurred: {e} when processing {file}")
+                self.import_report[file] = {
+                    "status": "failed", "warnings": [], "error": str(e),
+                    "metadata": None, "sanity": None,
+                }
+            else:
+                self.import_report[file] = {
+                    "status": "success", "warnings": warnings, "error": None,
+                    "metadata": metadata, "sanity": sanity,
+                }
+                yield file, data
+
+    def _iter_import(self, files: List[Path], workers: int = 1, **kwargs):
+        """
+        Import the given files one by one, or in parallel if workers > 1, and
+        record the outcome of each of them in import_report.
+
+        Yields:
+            tuple: The path and the processed DataFrame of each file imported
+                   successfully.
+        """
+        if workers > 1 and len(files) > 1:
+            self.logger.info(f"Importing {len(files)} files with {workers} workers")
+            yield from self._import_files_in_pool(files, workers, **kwargs)
+            return
+
+        # The workers are used for the sheets of xlsx files instead
+        kwargs["sheet_workers"] = workers
+        for file in files:
+            try:
+                data, warnings, metadata, sanity = self._import_file(file, **kwargs)
+            except Exception as e:
+                self.import_report[file] = {
+                    "status": "failed", "warnings": [], "error": str(e),
+                    "metadata": None, "sanity": None,
+                }
+                raise
+            self.import_report[file] = {
+                "status": "success", "warnings": warnings, "error": None,
+                "metadata": metadata, "sanity": sanity,
+            }
+            yield file, data
+
+    def iter_import(
+        self,
+        path_or_file: Path,
+        cycler: str = "",
+        file_type: str = "csv",
+        save_option: str = "save",
+        state_option: str = "",
+        workers: int = 1,
+        sheets: Union[str, List[str]] = "active",
+        engine: str = "c",
+        na_option: str = "all",
+        check_option: str = "full",
+        cache_option: str = "",
+    ):
+        """
+        Import, process, and optionally save battery data, yielding the data of
+        each file as soon as it has been processed. The outcome of each file is
+        stored in the import_report attribute, as in data_importer.
+
+        Args:
+            path_or_file (pathlib.path): Path to a directory or file containing battery
+                                data.
+            file_type (str, optional): The type of file to save as. Defaults to
+                                        "csv".
+            save_option (str, optional): Option for saving files. Defaults to
+                                        "save".
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            workers (int, optional): Number of processes used to import the files
+                                     in parallel. With more than one worker, the files
+                                     are yielded in the order they finish. Defaults to
+                                     1.
+            sheets (str or List[str], optional): Sheets of xlsx files to import, see
+                                                 data_importer. Defaults to "active".
+            engine (str, optional): Parser engine, see data_importer. Defaults to
+                                    "c".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see data_importer. Defaults to "full".
+            cache_option (str, optional): Option to use the cached imports, see
+                                          data_importer. Defaults to "".
+
+        Returns:
+            Iterator[tuple]: The path of each file and its processed DataFrame.
+        """
+        self.logger.info("Importing data")
+        self.import_report = {}
+        return self._iter_import(
+            self.look_for_files(path_or_file),
+            workers,
+            cycler=cycler,
+            file_type=file_type,
+            save_option=save_option,
+            state_option=state_option,
+            sheets=sheets,
+            engine=engine,
+            na_option=na_option,
+            check_option=check_option,
+            cache_option=cache_option,
+        )
+
+    def data_importer(
+        self,
+        path_or_file: Path,
+        cycler: str = "",
+        file_type: str = "csv",
+        save_option: str = "save",
+        state_option: str = "",
+        print_option: str = "",
+        workers: int = 1,
+        sheets: Union[str, List[str]] = "active",
+        engine: str = "c",
+        na_option: str = "all",
+        check_option: str = "full",
+        cache_option: str = "",
+    ) -> Union[pd.DataFrame, dict]:
+        """
+        Import, process, and optionally save and/or print battery data.
+
+        The outcome of each file is stored in the import_report attribute, mapping
+        the file path to its status ("success" or "failed"), the warnings raised
+        while processing it, the error that stopped it, if any, its metadata
+        record, see extract_metadata, and its sanity check report, see
+        sanity_check. The metadata record is saved as JSON next to the processed
+        data.
+
+        Args:
+            path_or_file (pathlib.path): Path to a directory or file containing battery
+                                data.
+            file_type (str, optional): The type of file to save as. Defaults to
+                                        "csv".
+            save_option (str, optional): Option for saving files. Defaults to
+                                        "save".
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            print_option (str, optional): Option for printing data and plots.
+                                            Defaults to "".
+            workers (int, optional): Number of processes used to import the files
+                                     of a directory in parallel. A file failing in a
+                                     worker is reported and does not stop the others.
+                                     Defaults to 1, which imports the files one by
+                                     one. When a single file is imported, the sheets
+                                     of an xlsx file are read in parallel instead.
+            sheets (str or List[str], optional): Sheets of xlsx files to import.
+                                                 "active" imports the active sheet,
+                                                 "all" every sheet with a header row
+                                                 and a list the given sheets. The
+                                                 sheets are joined in order, keeping
+                                                 "Time [s]" continuous. Defaults to
+                                                 "active".
+            engine (str, optional): Parser engine of the data, "c" or "pyarrow".
+                                    The pyarrow engine is faster on large files
+                                    and falls back to the C engine for the files
+                                    it cannot read. Defaults to "c".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       "all" or "standard" to ignore the missing
+                                       values of auxiliary columns. Defaults to
+                                       "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          "full" checks every row, "sample" random
+                                          blocks of rows and "" skips it. Defaults
+                                          to "full".
+            cache_option (str, optional): Option to cache the imports, "yes" to
+                                          return the cached import of a file when
+                                          neither the file, the parser
+                                          configuration nor the options changed,
+                                          without saving the file again. The cache
+                                          is stored in the processed folder.
+                                          Defaults to "".
+
+        Returns:
+            pd.DataFrame or dict: The processed data if path_or_file is a file. If it
+                                  is a directory, a dictionary mapping the path of
+                                  each file imported successfully to its data.
+        """
+        self.logger.info("Importing data")
+        self.import_report = {}
+        files = self.look_for_files(path_or_file)
+        results = dict(self._iter_import(
+            files,
+            workers,
+            cycler=cycler,
+            file_type=file_type,
+            save_option=save_option,
+            state_option=state_option,
+            sheets=sheets,
+            engine=engine,
+            na_option=na_option,
+            check_option=check_option,
+            cache_option=cache_option,
+        ))
+        # Keep the order of the files, whatever the order they finished in
+        results = {file: results[file] for file in files if file in results}
+
+        for file, data in results.items():
             # Print the dataframe and the plots if print_option is 'yes' or all
             if print_option in ["yes", "diff"]:
                 try:
@@ -886,5 +2576,126 @@ class Parser:
                 except Exception as e:
                     self.logger.error(f"An error occurred: {e} when processing {file}")
 
-        # Return the data from the last file processed, or None if all failed
-        return data
+        if path_or_file.is_dir():
+            return results
+        # Return the data of the file, or None if it failed
+        return results.get(path_or_file)
+
+    def chunked_importer(
+        self,
+        path_or_file: Path,
+        cycler: str = "",
+        chunksize: int = 100000,
+        state_option: str = "",
+        na_option: str = "all",
+        check_option: str = "full",
+    ) -> Union[Path, dict]:
+        """
+        Import and process battery data in chunks, so that files larger than the
+        memory can be processed. The header, encoding and start time are found
+        once per file, then each chunk goes through the same steps as in
+        data_importer and is appended to a parquet file in the processed folder.
+        The columns that are not standardised keep the type of the first chunk.
+        The outcome of each file is stored in the import_report attribute.
+
+        Args:
+            path_or_file (pathlib.path): Path to a directory or file containing battery
+                                data.
+            cycler (str, optional): Cycler or header line number passed to
+                                    find_words. Defaults to "".
+            chunksize (int, optional): Number of rows read and processed at once.
+                                       Defaults to 100000.
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see data_importer. Defaults to "full".
+
+        Returns:
+            pathlib.Path or dict: The path to the parquet file if path_or_file is a
+                                  file. If it is a directory, a dictionary mapping
+                                  the path of each file to its parquet file.
+        """
+        self.logger.info("Importing data in chunks")
+        self.import_report = {}
+        results = {}
+        for file in self.look_for_files(path_or_file):
+            try:
+                results[file], warnings, metadata, sanity = self._import_file_chunked(
+                    file, cycler, chunksize, state_option, na_option, check_option
+                )
+            except Exception as e:
+                self.import_report[file] = {
+                    "status": "failed", "warnings": [], "error": str(e),
+                    "metadata": None, "sanity": None,
+                }
+                raise
+            self.import_report[file] = {
+                "status": "success", "warnings": warnings, "error": None,
+                "metadata": metadata, "sanity": sanity,
+            }
+
+        if path_or_file.is_dir():
+            return results
+        return results[path_or_file]
+
+    def incremental_importer(
+        self,
+        path_or_file: Path,
+        cycler: str = "",
+        state_option: str = "",
+        na_option: str = "all",
+        check_option: str = "full",
+    ) -> Union[pd.DataFrame, dict]:
+        """
+        Import and process battery data incrementally, for files still being
+        written by a cycler and polled regularly. On the first import of a file,
+        its header, encoding, equipment type and metadata are found and its data
+        is processed as in data_importer. On the next imports, only the rows
+        appended to the file since are parsed and processed, and added to the data
+        imported before. The data and the progress of each file are kept in the
+        incremental subdirectory of the processed folder, apart from the cached
+        imports of data_importer. The outcome of each file is stored in the
+        import_report attribute.
+
+        Args:
+            path_or_file (pathlib.path): Path to a directory or file containing battery
+                                data.
+            cycler (str, optional): Cycler or header line number passed to
+                                    find_words. Defaults to "".
+            state_option (str, optional): Option to add battery state labels.
+                                            Defaults to "".
+            na_option (str, optional): Columns where a missing value drops the row,
+                                       see remove_unwanted. Defaults to "all".
+            check_option (str, optional): Option for the three electrode check,
+                                          see data_importer. Defaults to "full".
+
+        Returns:
+            pd.DataFrame or dict: The data imported so far if path_or_file is a file.
+                                  If it is a directory, a dictionary mapping the
+                                  path of each file to its data.
+        """
+        self.logger.info("Importing data incrementally")
+        self.import_report = {}
+        results = {}
+        for file in self.look_for_files(path_or_file):
+            try:
+                data, warnings, metadata, sanity = self._import_file_incremental(
+                    file, cycler, state_option, na_option, check_option
+                )
+            except Exception as e:
+                self.import_report[file] = {
+                    "status": "failed", "warnings": [], "error": str(e),
+                    "metadata": None, "sanity": None,
+                }
+                raise
+            self.import_report[file] = {
+                "status": "success", "warnings": warnings, "error": None,
+                "metadata": metadata, "sanity": sanity,
+            }
+            results[file] = data
+
+        if path_or_file.is_dir():
+            return results
+        return results[path_or_file]
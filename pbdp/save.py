@@ -1,4 +1,6 @@
+from datetime import datetime
 from pathlib import Path
+import json
 import pandas as pd
 import logging
 
@@ -59,3 +61,33 @@ def save_file(data: pd.DataFrame, file_type: str, file_path: Path,
         raise ValueError(f"Unsupported file type: {file_type}")
 
     return output_path
+
+
+def save_metadata(metadata: dict, file_path: Path,
+                  logger_name: str = 'pbdp_logger') -> Path:
+    """
+    Save the metadata record of a file as JSON next to its cleaned data.
+
+    Args:
+        metadata (dict): The metadata record, see Parser.extract_metadata.
+        file_path (Path): The path of the original input file.
+
+    Returns:
+        Path: The path to the saved metadata file.
+    """
+    logger = logging.getLogger(logger_name)
+    output_dir = file_path.parent / "processed"
+    output_dir.mkdir(exist_ok=True)
+    file_name = file_path.name.split(".")[0]
+    output_path = output_dir / f"{file_name}_metadata.json"
+
+    # Dates are saved in ISO format
+    metadata = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in metadata.items()
+    }
+    with output_path.open("w") as f:
+        json.dump(metadata, f, indent=4, allow_nan=False)
+    logger.info(f"Output metadata file saved at {output_path}")
+
+    return output_path
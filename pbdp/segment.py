@@ -188,7 +188,7 @@ def find_periods(
 
 
 def segment_data(data: pd.DataFrame, requests: list, reset: bool = False,
-                 logger_name: str = 'pbdp_logger') -> list:
+                 logger_name: str = 'pbdp_logger', engine: str = "numpy") -> list:
     """
     Segments the battery data based on the provided requests.
 
@@ -196,6 +196,8 @@ def segment_data(data: pd.DataFrame, requests: list, reset: bool = False,
         data (pd.DataFrame): The input DataFrame containing battery data.
         requests (list): A list of strings specifying the segments to be
                         extracted.
+        engine (str): Engine used to find the CC and CV periods if the data has
+                      no CCCV column, see find_cc_and_cv. Default is "numpy".
 
     Returns:
         list: A list of filtered DataFrames representing the segmented data.
@@ -217,7 +219,7 @@ def segment_data(data: pd.DataFrame, requests: list, reset: bool = False,
     required_cols = ["CCCV", "Battery State"]
     for col in required_cols:
         if col not in data.columns:
-            data = find_cc_and_cv(data)
+            data = find_cc_and_cv(data, engine=engine)
 
     logger.info('Required columns found in dataframe')
 
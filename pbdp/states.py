@@ -1,11 +1,57 @@
+import numpy as np
 import pandas as pd
 import logging
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Labels of the state columns, stored as categoricals with int8 codes
+BATTERY_STATES = pd.CategoricalDtype(["unknown", "rest", "charging", "discharging"])
+CCCV_STATES = pd.CategoricalDtype(["N/A", "CC", "CV"])
+
+
+def state_codes(data: pd.DataFrame, current_epsilon: float = 0.001,
+                logger_name: str = 'pbdp_logger') -> np.ndarray:
+    """
+    Classify the battery state of each row based on current values, without
+    modifying the DataFrame, so that read-only or memory-mapped data can be
+    labelled.
+
+    Args:
+        data (pd.DataFrame): The input DataFrame containing battery data.
+        current_epsilon (float, optional): Threshold to classify current
+                                            values as rest, charging,
+                                            discharging. Default is 0.001.
+
+    Returns:
+        np.ndarray: The int8 codes of the states in BATTERY_STATES: 0 unknown,
+                    1 rest, 2 charging and 3 discharging.
+
+    Raises:
+        ValueError: If the current column is not present in the DataFrame.
+    """
+    logger = logging.getLogger(logger_name)
+    if "Current [A]" not in data.columns:
+        logger.error("Current [A], required column not found in dataframe")
+        raise ValueError("Current [A], required column not found in dataframe")
+
+    # The masks of the states are disjoint, so each one adds its code to the
+    # rows it holds for, leaving 0 for unknown, e.g. missing current values
+    current = data["Current [A]"].to_numpy(dtype=float)
+    codes = (np.abs(current) < current_epsilon).view(np.int8)
+    codes += (current > current_epsilon).view(np.int8) * np.int8(2)
+    codes += (current < -current_epsilon).view(np.int8) * np.int8(3)
+    logger.info("states classified")
+    return codes
+
 
 def add_state_label(data: pd.DataFrame, current_epsilon: float = 0.001,
                     logger_name: str = 'pbdp_logger') -> pd.DataFrame:
     """
-    Add battery state labels to the DataFrame based on current values.
+    Add battery state labels to the DataFrame based on current values, see
+    state_codes.
 
     Args:
         data (pd.DataFrame): The input DataFrame containing battery data.
@@ -14,7 +60,8 @@ def add_state_label(data: pd.DataFrame, current_epsilon: float = 0.001,
                                             discharging. Default is 0.001.
 
     Returns:
-        pd.DataFrame: DataFrame with added "Battery State" column.
+        pd.DataFrame: DataFrame with added "Battery State" column, a categorical
+                      of BATTERY_STATES.
 
     Raises:
         ValueError: If required columns are not present in the DataFrame.
@@ -27,19 +74,8 @@ def add_state_label(data: pd.DataFrame, current_epsilon: float = 0.001,
             logger.error(f"{col}, required column not found in dataframe")
             raise ValueError(f"{col}, required column not found in dataframe")
 
-    # Set initial state label to "unknown" for all rows
-    data["Battery State"] = "unknown"
-
-    # Define masks for each state
-    rest_mask = data["Current [A]"].abs().lt(current_epsilon)
-    charging_mask = data["Current [A]"].gt(current_epsilon)
-    discharging_mask = data["Current [A]"].lt(-current_epsilon)
-    logger.info("masks created")
-
-    # Assign labels for each state
-    data.loc[rest_mask, "Battery State"] = "rest"
-    data.loc[charging_mask, "Battery State"] = "charging"
-    data.loc[discharging_mask, "Battery State"] = "discharging"
+    codes = state_codes(data, current_epsilon, logger_name)
+    data["Battery State"] = pd.Categorical.from_codes(codes, dtype=BATTERY_STATES)
     logger.info("labels assigned")
     return data
 
@@ -49,9 +85,11 @@ def find_cc_and_cv(
     current_epsilon: float = 0.001,
     voltage_epsilon: float = 0.001,
     time_t: float = 10.0,
-    rest_t: int = 8,
-    cc_t: int = 5,
-    logger_name: str = 'pbdp_logger'
+    rest_t: float = 8,
+    cc_t: float = 5,
+    logger_name: str = 'pbdp_logger',
+    engine: str = "numpy",
+    lookback_option: str = "rows",
 ) -> pd.DataFrame:
     """
     Identify constant current (CC) and constant voltage (CV) periods in the
@@ -62,14 +100,28 @@ def find_cc_and_cv(
         current_epsilon (float): A small value to consider as near-zero current.
         voltage_epsilon (float): A small value for near-zero voltage difference.
         time_t (float): Time threshold for considering CC and CV period.
-        rest_t (int): Rows threshold for detecting a 'rest' period before a CC
-                        interval.
-        cc_t (int): Rows threshold for detecting a 'CC' period before a CC
-                    interval.
+        rest_t (float): Rows, or seconds, threshold for detecting a 'rest'
+                        period before a CC interval.
+        cc_t (float): Rows, or seconds, threshold for detecting a 'CC' period
+                      before a CC interval.
+        engine (str): "numpy" to find the periods with run-length encoding over
+                      arrays, or "numba" to run a compiled kernel over the rows,
+                      if numba is installed, see _cc_and_cv_rows. Default is
+                      "numpy".
+        lookback_option (str): "rows" to look rest_t and cc_t rows back by index
+                               label, or "time" to look rest_t and cc_t seconds
+                               back, to the last row at or before that time, so
+                               that the thresholds do not depend on the sampling
+                               rate. Default is "rows".
 
     Returns:
         pd.DataFrame: The input DataFrame with 'CCCV' column updated with 'CC'
-                        and 'CV' labels.
+                        and 'CV' labels, a categorical of CCCV_STATES.
+
+    Raises:
+        ValueError: If the engine or the lookback option is not supported.
+        KeyError: If a row rest_t or cc_t rows before an interval is not in the
+                  index.
     """
     logger = logging.getLogger(logger_name)
     # Check if required columns are present in dataframe
@@ -79,40 +131,276 @@ def find_cc_and_cv(
             data = add_state_label(data)
             logger.info(f"{col} column not found in dataframe, added it")
 
-    data["CCCV"] = "N/A"
-    rest_mask = data["Current [A]"].abs().lt(current_epsilon)
+    if lookback_option not in ["rows", "time"]:
+        logger.warning(f"Unsupported lookback option: {lookback_option}")
+        raise ValueError(f"Unsupported lookback option: {lookback_option}")
+    lookback = (rest_t, cc_t, lookback_option)
+    if engine == "numba" and _compiled_kernel is None:
+        logger.warning("numba is not installed, the numpy engine is used")
+        engine = "numpy"
+    if engine == "numba":
+        codes = _cc_and_cv_kernel(
+            data, current_epsilon, voltage_epsilon, time_t, lookback, _compiled_kernel
+        )
+    elif engine == "numpy":
+        codes = _cc_and_cv_numpy(
+            data, current_epsilon, voltage_epsilon, time_t, lookback, logger
+        )
+    else:
+        logger.warning(f"Unsupported engine: {engine}")
+        raise ValueError(f"Unsupported engine: {engine}")
+    data["CCCV"] = pd.Categorical.from_codes(codes, dtype=CCCV_STATES)
+    logger.info("CC and CV intervals labelled")
+    return data
+
+
+def _cc_and_cv_numpy(data: pd.DataFrame, current_epsilon: float,
+                     voltage_epsilon: float, time_t: float, lookback: tuple,
+                     logger: logging.Logger) -> np.ndarray:
+    """
+    Find the CCCV codes with run-length encoding over NumPy arrays, see
+    find_cc_and_cv. lookback holds rest_t, cc_t and the lookback option.
+    """
+    rest_t, cc_t, lookback_option = lookback
+    rest_mask = data["Current [A]"].abs().lt(current_epsilon).to_numpy()
+    time = data["Time [s]"].to_numpy(dtype=float)
+    codes = np.zeros(len(data), dtype=np.int8)
 
-    # Group rows with constant current values
-    cc_intervals = data[~rest_mask].groupby(
-        data["Current [A]"].diff().abs().gt(current_epsilon).cumsum()
+    # Runs of rows with constant current values, each interval being the rows of
+    # a run that are not at rest
+    jumps = data["Current [A]"].diff().abs().gt(current_epsilon).to_numpy()
+    first, valid, interval_of_row = _intervals(
+        np.cumsum(jumps), ~rest_mask, time, time_t
     )
     logger.info("CC intervals created")
 
-    # Loop over each constant current interval and update columns
-    for _, group in cc_intervals:
-        if group["Time [s]"].iloc[-1] - group["Time [s]"].iloc[0] >= time_t:
-            group_indices = group.index.tolist()
+    # An interval is CC if there is a 'rest' period rest_t before it, or a 'CC'
+    # period cc_t before it
+    is_rest = (data["Battery State"] == "rest").to_numpy()
+    after_rest = np.zeros(len(first), dtype=bool)
+    rest_rows = _lookback_rows(data, first[valid], rest_t, lookback_option, True)
+    after_rest[valid] = (rest_rows >= 0) & is_rest[rest_rows]
+    depends = valid & ~after_rest
+    cc_rows = _lookback_rows(data, first[depends], cc_t, lookback_option, True)
+    previous = np.where(cc_rows >= 0, interval_of_row[cc_rows], -1)
+    # Only the intervals before it are already labelled when it is checked
+    previous[previous >= np.flatnonzero(depends)] = -1
 
-            # Check if there is a 'rest' or 'CC' period before the group
-            if (
-                data.loc[group_indices[0] - rest_t, "Battery State"] == "rest"
-                or data.loc[group_indices[0] - cc_t, "CCCV"] == "CC"
-            ):
-                data.loc[group_indices, "CCCV"] = "CC"
-
-    CC_mask = data["CCCV"] == "CC"
+    # Follow the chains of intervals depending on the one before them, halving
+    # their length at each step, up to an interval after a rest period or not CC
+    follow = np.arange(len(first))
+    follow[np.flatnonzero(depends)[previous >= 0]] = previous[previous >= 0]
+    while True:
+        followed = follow[follow]
+        if (followed == follow).all():
+            break
+        follow = followed
+    in_interval = interval_of_row >= 0
+    codes[in_interval] = after_rest[follow][interval_of_row[in_interval]]
     logger.info("CC intervals updated")
 
-    # Group rows with constant voltage values
-    cv_intervals = data[~rest_mask].groupby(
-        data[~CC_mask]["Voltage [V]"].diff().abs().gt(voltage_epsilon).cumsum()
+    # Runs of rows with constant voltage values among the rows not CC, each
+    # interval being the rows of a run that are not at rest
+    cc_mask = codes == 1
+    voltage = data["Voltage [V]"].to_numpy(dtype=float)[~cc_mask]
+    jumps = np.zeros(len(data), dtype=bool)
+    jumps[~cc_mask] = np.abs(np.diff(voltage, prepend=np.nan)) > voltage_epsilon
+    _, valid, interval_of_row = _intervals(
+        np.cumsum(jumps), ~rest_mask & ~cc_mask, time, time_t
     )
     logger.info("CV intervals created")
 
-    # Loop over each constant voltage interval and update columns
-    for i, group in cv_intervals:
-        if group["Time [s]"].iloc[-1] - group["Time [s]"].iloc[0] >= time_t:
-            group_indices = group.index.tolist()
-            data.loc[group_indices, "CCCV"] = "CV"
+    in_interval = interval_of_row >= 0
+    cv_rows = np.flatnonzero(in_interval)[valid[interval_of_row[in_interval]]]
+    codes[cv_rows] = 2
     logger.info("CV intervals updated")
-    return data
+    return codes
+
+
+def _cc_and_cv_kernel(data: pd.DataFrame, current_epsilon: float,
+                      voltage_epsilon: float, time_t: float, lookback: tuple,
+                      kernel=None) -> np.ndarray:
+    """
+    Find the CCCV codes with the row by row kernel, see _cc_and_cv_rows. lookback
+    holds rest_t, cc_t and the lookback option, see find_cc_and_cv.
+
+    Args:
+        kernel (callable, optional): The compiled kernel. Defaults to None, which
+                                     runs _cc_and_cv_rows in Python.
+
+    Raises:
+        KeyError: If a row rest_t or cc_t rows before an interval is not in the
+                  index.
+    """
+    rest_t, cc_t, lookback_option = lookback
+    rows = np.arange(len(data))
+    codes, missing, shift = (kernel or _cc_and_cv_rows)(
+        data["Current [A]"].to_numpy(dtype=float),
+        data["Voltage [V]"].to_numpy(dtype=float),
+        data["Time [s]"].to_numpy(dtype=float),
+        (data["Battery State"] == "rest").to_numpy(),
+        _lookback_rows(data, rows, rest_t, lookback_option),
+        _lookback_rows(data, rows, cc_t, lookback_option),
+        current_epsilon,
+        voltage_epsilon,
+        time_t,
+        lookback_option == "rows",
+    )
+    if missing >= 0:
+        _lookback_rows(data, rows[missing:missing + 1], (rest_t, cc_t)[shift], "rows",
+                       check=True)
+    return codes
+
+
+def _cc_and_cv_rows(current, voltage, time, is_rest, rest_rows, cc_rows,
+                    current_epsilon, voltage_epsilon, time_t, strict):
+    """
+    Find the CCCV codes in one pass over the rows for the CC periods and one for
+    the CV periods, labelling each interval when the next one starts, as the
+    labels of the CC periods depend on those before them. Compiled with numba
+    when it is installed.
+
+    Args:
+        current, voltage, time (np.ndarray): The current, voltage and time of
+                                             each row.
+        is_rest (np.ndarray): Whether the battery state of each row is rest.
+        rest_rows, cc_rows (np.ndarray): The row rest_t and cc_t before each
+                                         row, -1 if there is none.
+        current_epsilon, voltage_epsilon, time_t (float): The thresholds, see
+                                                          find_cc_and_cv.
+        strict (bool): Whether a missing row before an interval is an error,
+                       rather than a period that is neither rest nor CC.
+
+    Returns:
+        tuple: The CCCV codes, the first row of the interval whose period before
+               is missing if strict, or -1, and 0 if that is the rest period, 1
+               the CC one.
+    """
+    n = len(current)
+    codes = np.zeros(n, dtype=np.int8)
+    selected = ~(np.abs(current) < current_epsilon)
+
+    # CC periods, intervals of the rows not at rest with constant current
+    run = 0
+    start = -1
+    start_run = 0
+    last = -1
+    for i in range(n + 1):
+        if i < n:
+            if i > 0 and np.abs(current[i] - current[i - 1]) > current_epsilon:
+                run += 1
+            if not selected[i]:
+                continue
+            if start >= 0 and run == start_run:
+                last = i
+                continue
+        # The interval before the row is complete, or the data has ended
+        if start >= 0 and time[last] - time[start] >= time_t:
+            if strict and rest_rows[start] < 0:
+                return codes, start, 0
+            is_cc = rest_rows[start] >= 0 and is_rest[rest_rows[start]]
+            if not is_cc:
+                if strict and cc_rows[start] < 0:
+                    return codes, start, 1
+                is_cc = cc_rows[start] >= 0 and codes[cc_rows[start]] == 1
+            if is_cc:
+                for j in range(start, last + 1):
+                    if selected[j]:
+                        codes[j] = 1
+        start = i
+        start_run = run
+        last = i
+
+    # CV periods, intervals of the rows not at rest nor CC with constant voltage
+    run = 0
+    start = -1
+    start_run = 0
+    last = -1
+    previous = -1
+    for i in range(n + 1):
+        if i < n:
+            if codes[i] == 1:
+                continue
+            if previous >= 0 and \
+                    np.abs(voltage[i] - voltage[previous]) > voltage_epsilon:
+                run += 1
+            previous = i
+            if not selected[i]:
+                continue
+            if start >= 0 and run == start_run:
+                last = i
+                continue
+        if start >= 0 and time[last] - time[start] >= time_t:
+            for j in range(start, last + 1):
+                if selected[j] and codes[j] == 0:
+                    codes[j] = 2
+        start = i
+        start_run = run
+        last = i
+    return codes, -1, 0
+
+
+_compiled_kernel = numba.njit(cache=True)(_cc_and_cv_rows) if numba else None
+
+
+def _intervals(runs: np.ndarray, selected: np.ndarray, time: np.ndarray,
+               time_t: float) -> tuple:
+    """
+    Find the intervals made of the selected rows of each run, and whether they last
+    at least time_t.
+
+    Args:
+        runs (np.ndarray): Non-decreasing run number of each row.
+        selected (np.ndarray): Mask of the rows in the intervals.
+        time (np.ndarray): Time of each row.
+        time_t (float): Time threshold of the intervals.
+
+    Returns:
+        tuple: The first row of each interval, whether it lasts at least time_t,
+               and the interval of each row, -1 if it is not selected.
+    """
+    rows = np.flatnonzero(selected)
+    new_run = np.diff(runs[rows], prepend=-1) != 0
+    starts = np.flatnonzero(new_run)
+    first = rows[starts]
+    last = rows[np.append(starts[1:], len(rows))[:len(starts)] - 1]
+    valid = time[last] - time[first] >= time_t
+    interval_of_row = np.full(len(runs), -1)
+    interval_of_row[rows] = np.cumsum(new_run) - 1
+    return first, valid, interval_of_row
+
+
+def _lookback_rows(data: pd.DataFrame, rows: np.ndarray, lookback: float,
+                   lookback_option: str, check: bool = False) -> np.ndarray:
+    """
+    Find the row lookback rows, by index label, or lookback seconds before each
+    of the given rows, see find_cc_and_cv.
+
+    Args:
+        data (pd.DataFrame): The input DataFrame containing battery data.
+        rows (np.ndarray): The positions of the rows.
+        lookback (float): Number of rows or seconds to look back.
+        lookback_option (str): "rows" or "time".
+        check (bool, optional): Whether to raise if a row is not found by index
+                                label. Defaults to False.
+
+    Returns:
+        np.ndarray: The position of the row before each row, -1 if there is none.
+
+    Raises:
+        KeyError: If check is set and a label is not in the index.
+    """
+    if lookback_option == "time":
+        # The running maximum of the time keeps it sorted for the search
+        time = data["Time [s]"].to_numpy(dtype=float)
+        target = time[rows] - lookback
+        found = np.searchsorted(np.fmax.accumulate(time), target, side="right") - 1
+        found[np.isnan(target)] = -1
+        return found
+
+    labels = data.index[rows] - lookback
+    found = data.index.get_indexer(labels)
+    if check and (found < 0).any():
+        missing = np.argmax(found < 0)
+        raise KeyError(labels[missing:missing + 1].tolist()[0])
+    return found
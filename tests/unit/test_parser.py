@@ -2,17 +2,27 @@
 # Tests for the Parser class
 #
 import pbdp
-from pbdp import segment
+from pbdp import save, segment, states
+import csv
+import hashlib
+import json
 import os
+import shutil
+import numpy as np
+import openpyxl
+import pandas as pd
+from datetime import datetime, time
 from pathlib import Path
 import pytest
 
 
 @pytest.fixture
-def data():
+def data(tmp_path):
     parser = pbdp.Parser()
+    # The processed files are saved next to a copy of the data
     path = Path(pbdp.__path__[0], "input", "data").absolute()
-    data = parser.data_importer(path_or_file=path / "Digatron.csv",
+    shutil.copy(path / "Digatron.csv", tmp_path / "Digatron.csv")
+    data = parser.data_importer(path_or_file=tmp_path / "Digatron.csv",
                                 file_type="csv", save_option="save all",
                                 state_option="yes")
     return data
@@ -164,6 +174,17 @@ class TestOptimisationResult():
         assert parser.standard_headers == standard_headers, \
             'Standard headers should be as expected'
 
+        # Check the metadata settings are set for each parser
+        parser = pbdp.Parser(
+            metadata_cache_size=2, numeric_metadata_fields=["mass"]
+        )
+        assert parser.metadata_cache_size == 2, 'Cache size should be set'
+        assert parser.numeric_metadata_fields == ("mass",), \
+            'Numeric fields should be a tuple'
+        assert pbdp.Parser().numeric_metadata_fields == (
+            "channel", "mass", "capacity"
+        ), 'Numeric fields should not be shared'
+
     def test_look_for_files(self):
         """Test the look_for_files method"""
         parser = pbdp.Parser()
@@ -197,6 +218,198 @@ class TestOptimisationResult():
     def test_data_importer(self, data):
         assert data is not None
 
+    def test_data_importer_workers(self, tmp_path):
+        """Test importing the files of a directory in parallel"""
+        path = Path(pbdp.__path__[0], "input", "data")
+        for file in ["Maccor.csv", "Novonix.csv", "test1.csv"]:
+            shutil.copy(path / file, tmp_path / file)
+
+        parser = pbdp.Parser()
+        assert parser.import_report == {}, 'Report should be empty before an import'
+        data = parser.data_importer(tmp_path, save_option="", workers=2)
+        assert set(data) == {tmp_path / "Maccor.csv", tmp_path / "Novonix.csv"}, \
+            'The data of each imported file should be returned'
+
+        # A failing file should be reported without stopping the others
+        report = parser.import_report
+        assert report[tmp_path / "Maccor.csv"]["status"] == "success", \
+            'Maccor should be imported'
+        assert report[tmp_path / "Novonix.csv"]["status"] == "success", \
+            'Novonix should be imported'
+        assert report[tmp_path / "Novonix.csv"]["warnings"], \
+            'Novonix warnings should be reported'
+        assert report[tmp_path / "test1.csv"]["status"] == "failed", \
+            'test1 should fail'
+
+        # A failing file stops the import without workers
+        with pytest.raises(ValueError):
+            parser.data_importer(tmp_path, save_option="")
+
+    def test_iter_import(self, tmp_path):
+        """Test iterating over the data of the files of a directory"""
+        path = Path(pbdp.__path__[0], "input", "data")
+        for file in ["Maccor.csv", "Novonix.csv"]:
+            shutil.copy(path / file, tmp_path / file)
+
+        parser = pbdp.Parser()
+        expected = parser.data_importer(tmp_path, save_option="")
+        assert list(expected) == parser.look_for_files(tmp_path), \
+            'Files should be in order'
+        assert set(parser.import_report) == set(expected), \
+            'Serial import should be reported'
+        results = parser.iter_import(tmp_path, save_option="")
+        assert parser.import_report == {}, 'Report should be reset for each import'
+        assert dict(results).keys() == parser.import_report.keys(), \
+            'Each file should be reported'
+        for workers in [1, 2]:
+            results = parser.iter_import(tmp_path, save_option="", workers=workers)
+            for file, data in results:
+                assert data.equals(expected[file]), \
+                    f'Data of {file.name} should be the same with {workers} workers'
+
+    def test_data_importer_cache(self, tmp_path):
+        """Test returning the cached import of an unchanged file"""
+        file = tmp_path / "Maccor.csv"
+        shutil.copy(Path(pbdp.__path__[0], "input", "data", "Maccor.csv"), file)
+
+        parser = pbdp.Parser()
+        expected = parser.data_importer(file, cache_option="yes")
+        cache_dir = tmp_path / "processed" / "cache" / "Maccor.csv"
+        assert len(list(cache_dir.iterdir())) == 2, 'Data and record should be cached'
+
+        # The cached import is returned without saving the file again
+        output = tmp_path / "processed" / "Maccor_cleaned_data.csv"
+        output.unlink()
+        data = parser.data_importer(file, cache_option="yes")
+        assert data.equals(expected), 'Cached data should be the same'
+        assert not output.exists(), 'Cached import should not be saved again'
+        assert parser.import_report[file]["metadata"]["channel"] == 41, \
+            'Cached metadata should be reported'
+
+        # A change of the configuration or of the file invalidates the cache
+        key = parser.cache_key(file, cycler="")
+        parser.standard_headers = {"Time [s]": ["TestTime"]}
+        assert parser.cache_key(file, cycler="") != key, \
+            'Cache key should change with the configuration'
+        parser = pbdp.Parser()
+        os.utime(file, ns=(0, 0))
+        assert parser.cache_key(file, cycler="") != key, \
+            'Cache key should change with the file'
+        parser.data_importer(file, cache_option="yes")
+        assert output.exists(), 'Changed file should be imported again'
+        assert len(list(cache_dir.iterdir())) == 2, \
+            'Previous cached import should be replaced'
+
+        # Check the cache of a file whose name starts with the same name is kept
+        other = tmp_path / "Maccor.csv_2.csv"
+        shutil.copy(file, other)
+        parser.data_importer(other, save_option="", cache_option="yes")
+        os.utime(file, ns=(1, 1))
+        parser.data_importer(file, save_option="", cache_option="yes")
+        assert len(list((cache_dir.parent / other.name).iterdir())) == 2, \
+            'Cache of another file should be kept'
+
+    def test_chunked_importer(self, tmp_path):
+        """Test importing a file in chunks to a parquet file"""
+        file = tmp_path / "Maccor.csv"
+        shutil.copy(Path(pbdp.__path__[0], "input", "data", "Maccor.csv"), file)
+
+        parser = pbdp.Parser()
+        expected = parser.data_importer(file, save_option="", state_option="yes")
+        output = parser.chunked_importer(file, chunksize=999, state_option="yes")
+        assert output == tmp_path / "processed" / "Maccor_cleaned_data.parquet", \
+            'Chunks should be saved to the processed folder'
+        assert parser.import_report[file]["status"] == "success", \
+            'Chunked import should be reported'
+
+        data = pd.read_parquet(output)
+        assert len(data) == len(expected), 'All rows should be imported'
+        for col in ["Time [s]", "Current [A]", "Voltage [V]", "Step Number"]:
+            assert np.allclose(data[col], expected[col]), \
+                f'{col} should be the same when imported in chunks'
+        assert (data["Battery State"] == expected["Battery State"]).all(), \
+            'Battery states should be the same when imported in chunks'
+        assert (
+            data["Absolute Time [s]"] - expected["Absolute Time [s]"]
+        ).abs().max() < pd.Timedelta(seconds=1e-3), \
+            'Absolute time should continue across chunks'
+
+        # A failed sanity check is only a warning, and every chunk still gets the
+        # absolute time
+        parser.standard_headers = dict(
+            parser.standard_headers, **{"freq [Hz]": ["VAR1"]}
+        )
+        output = parser.chunked_importer(file, chunksize=1000)
+        report = parser.import_report[file]
+        assert report["status"] == "success", \
+            'Chunked import should succeed when the check fails'
+        assert any("frequency data" in warning for warning in report["warnings"]), \
+            'Failed check should be a warning'
+        data = pd.read_parquet(output)
+        assert len(data) == len(expected), 'All rows should be imported'
+        assert data["Absolute Time [s]"].notna().all(), \
+            'Every chunk should have the absolute time'
+
+        # A gap in an int column several chunks in keeps the inferred type for that
+        # chunk, as when the whole file is read
+        lines = Path(
+            pbdp.__path__[0], "input", "data", "Maccor.csv"
+        ).read_bytes().split(b"\n")
+        fields = lines[5000].split(b",")
+        fields[3] = fields[11] = b""
+        lines[5000] = b",".join(fields)
+        file.write_bytes(b"\n".join(lines))
+        parser = pbdp.Parser()
+        expected = parser.data_importer(file, save_option="")
+        output = parser.chunked_importer(file, chunksize=1000)
+        assert parser.import_report[file]["status"] == "success", \
+            'Chunked import should succeed with a gap in an int column'
+        assert len(pd.read_parquet(output)) == len(expected), \
+            'All rows should be imported'
+
+    def test_incremental_importer(self, tmp_path):
+        """Test importing the rows appended to a file since its last import"""
+        contents = Path(pbdp.__path__[0], "input", "data", "Maccor.csv").read_bytes()
+        file = tmp_path / "Maccor.csv"
+        file.write_bytes(contents)
+
+        parser = pbdp.Parser()
+        expected = parser.data_importer(file, save_option="", state_option="yes")
+
+        # The file is written in parts, the last line of the first part unfinished
+        cut = contents.rfind(b"\n", 0, len(contents) // 2) + 10
+        file.write_bytes(contents[:cut])
+        first = parser.incremental_importer(file, state_option="yes")
+        assert 0 < len(first) < len(expected), 'Only complete rows should be imported'
+        with file.open("ab") as f:
+            f.write(contents[cut:])
+        data = parser.incremental_importer(file, state_option="yes")
+        assert data.equals(expected), \
+            'Data should be the same when the file is imported incrementally'
+        assert parser.import_report[file]["status"] == "success", \
+            'Incremental import should be reported'
+
+        # A cached import of the file keeps the incremental state
+        state = list((tmp_path / "processed" / "incremental").iterdir())
+        parser.data_importer(file, save_option="", cache_option="yes")
+        assert state and all(path.exists() for path in state), \
+            'Incremental state should be kept by a cached import'
+        with file.open("ab") as f:
+            f.write(contents[contents.rfind(b"\n", 0, -1) + 1:])
+        data = parser.incremental_importer(file, state_option="yes")
+        assert len(data) == len(expected) + 1, \
+            'Only the appended row should be imported after a cached import'
+        assert data.iloc[:-1].equals(expected), \
+            'Rows imported before should be kept'
+        file.write_bytes(contents)
+
+        # A replaced file is imported again from the start
+        file.write_bytes(contents.replace(b"Maccor #3", b"Maccor #4"))
+        data = parser.incremental_importer(file, state_option="yes")
+        assert data.equals(expected), 'Replaced file should be imported again'
+        assert parser.import_report[file]["metadata"]["tester"] == "Maccor #4", \
+            'Metadata of the replaced file should be reported'
+
     def test_segment_data(self, data):
         segment.segment_data(data, requests=["step"])
         segment.segment_data(data, requests=["step 10:20"])
@@ -227,10 +440,196 @@ class TestOptimisationResult():
         pulse = segment.segment_data(data, requests=["pulse -10A"])
         segment.find_rest(data=data, segments=pulse)
 
+    def test_add_state_label(self):
+        """Test the state labels are stored as categoricals"""
+        data = pd.DataFrame({
+            "Current [A]": [0.0, 1.0, -1.0, np.nan],
+            "Voltage [V]": [3.5, 3.6, 3.4, 3.5],
+            "Time [s]": [1.0, 1.0, 1.0, 1.0],
+        })
+        data = states.add_state_label(data)
+        assert data["Battery State"].dtype == states.BATTERY_STATES, \
+            'Battery states should be categorical'
+        assert data["Battery State"].cat.codes.dtype == np.int8, \
+            'Battery states should be stored as int8 codes'
+        assert data["Battery State"].tolist() == [
+            "rest", "charging", "discharging", "unknown"
+        ], 'Battery states should be labelled from the current'
+
+        # Check the codes can be found without modifying read-only data
+        current = np.array([0.0, 1.0, -1.0, 0.001])
+        current.flags.writeable = False
+        frame = pd.DataFrame({"Current [A]": current}, copy=False)
+        assert states.state_codes(frame).tolist() == [1, 2, 3, 0], \
+            'Codes should be found from the current'
+        assert frame.columns.tolist() == ["Current [A]"], \
+            'Data should not be modified'
+
+    def test_find_cc_and_cv(self):
+        """Test the CC and CV labels against those of the bundled data files"""
+        path = Path(pbdp.__path__[0], "input", "data")
+        # Digests of the int8 codes of the labels found by the groupby loop the
+        # labelling replaced, with the default and with the shortest thresholds
+        expected = {
+            "Maccor.csv": ["8fa709d229d7042a80289a518ce69de728a23875",
+                           "d3d3200f07a6366feee70db7bf5b35cb4bd20af2"],
+            "Digatron.csv": ["16a62dfd4ad4c324f5f3831e0cb25ce54f39b44c",
+                             "d0e4ca669e80117586dc82eee0c30eef97763a9c"],
+            "Novonix.csv": ["433bc49e1336e2eb78889ca3ab5b2ec7dbfa699c",
+                            "dec7f22bee59d0bd09ab5223687e5e9d1eb7150f"],
+        }
+        parser = pbdp.Parser()
+        for file, digests in expected.items():
+            data = parser.data_importer(path / file, save_option="", state_option="yes")
+            for options, digest in zip([{}, {"time_t": 0, "rest_t": 1, "cc_t": 1}],
+                                       digests):
+                labels = states.find_cc_and_cv(data.copy(), **options)["CCCV"]
+                codes = labels.cat.codes.to_numpy().tobytes()
+                assert hashlib.sha1(codes).hexdigest() == digest, \
+                    f'CCCV labels of {file} should not change with {options}'
+
+            # The row by row kernel, run in Python, gives the same labels
+            codes = states._cc_and_cv_kernel(data, 0.001, 0.001, 10.0, (8, 5, "rows"))
+            assert hashlib.sha1(codes.tobytes()).hexdigest() == digests[0], \
+                f'CCCV labels of {file} should be the same with the kernel'
+
+        # A period before the first row cannot be checked
+        with pytest.raises(KeyError):
+            states.find_cc_and_cv(data.iloc[:100].copy(), time_t=0, rest_t=200)
+        with pytest.raises(KeyError):
+            states._cc_and_cv_kernel(data.iloc[:100], 0.001, 0.001, 0, (200, 5, "rows"))
+
+        # The numba engine falls back to numpy if numba is not installed
+        labels = states.find_cc_and_cv(data.copy(), engine="numba")["CCCV"]
+        codes = labels.cat.codes.to_numpy().tobytes()
+        assert hashlib.sha1(codes).hexdigest() == digests[0], \
+            'CCCV labels should be the same with the numba engine'
+        with pytest.raises(ValueError):
+            states.find_cc_and_cv(data.copy(), engine="other")
+
+    def test_find_cc_and_cv_lookback(self):
+        """Test the periods before the intervals are found in seconds"""
+        def cycle(rate):
+            # Rest, discharge, a short rest and charge, sampled at rate Hz
+            time = np.arange(0, 70, 1 / rate)
+            current = np.select(
+                [time < 10, time < 30, time < 35], [0.0, -1.0, 0.0], 1.0
+            )
+            return pd.DataFrame({
+                "Time [s]": time, "Current [A]": current, "Voltage [V]": 3.7
+            })
+
+        for rate in [1, 10]:
+            data = cycle(rate)
+            labels = states.find_cc_and_cv(
+                data.copy(), rest_t=3, cc_t=2, lookback_option="time"
+            )["CCCV"]
+            assert (labels[data["Time [s]"] >= 35] == "CC").all(), \
+                f'Charge should be CC after the rest at {rate} Hz'
+            codes = states._cc_and_cv_kernel(
+                states.add_state_label(data), 0.001, 0.001, 10.0, (3, 2, "time")
+            )
+            assert (codes == labels.cat.codes).all(), \
+                f'Kernel should give the same labels at {rate} Hz'
+        # Eight rows before the charge are in the discharge at 1 Hz
+        labels = states.find_cc_and_cv(data.copy())["CCCV"]
+        assert (labels[data["Time [s]"] >= 35] == "CC").all(), \
+            'Charge should be CC after the rest at 10 Hz'
+        labels = states.find_cc_and_cv(cycle(1))["CCCV"]
+        assert (labels[cycle(1)["Time [s]"] >= 35] != "CC").all(), \
+            'Charge should not be CC eight rows after the discharge at 1 Hz'
+        with pytest.raises(ValueError):
+            states.find_cc_and_cv(data.copy(), lookback_option="other")
+
     def test_convert_xlsx_to_csv(self):
         """Test the convert_xlsx_to_csv method"""
         pass
 
+    def test_read_xlsx(self, tmp_path):
+        """Test the read_xlsx method"""
+        rows = [
+            ["Name:", "test"],
+            ["Started", "17/08/2018 14:30"],
+            ["Rec", "Step", "TestTime", "Current [A]", "Voltage [V]", None, "Md"],
+            [1, 1, 0.0, 1.5, 3.6, None, "C"],
+            [2, 1, 0.5, 1.5, 3.7, None, "C"],
+            [3, 2, 1.0, 0.0, 3.7, None, "R"],
+        ]
+        workbook = openpyxl.Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(tmp_path / "test.xlsx")
+        with (tmp_path / "test.csv").open(mode="w", newline="") as f:
+            csv.writer(f).writerows(rows)
+
+        parser = pbdp.Parser()
+        metadata, data, cycler = parser.read_xlsx(tmp_path / "test.xlsx")
+        assert metadata == b"Name:,test,,,,,\r\nStarted,17/08/2018 14:30,,,,,\r\n", \
+            'Rows before the header should be the metadata'
+        assert cycler == "maccor", 'Cycler should be maccor'
+        assert data.columns.tolist() == [
+            "Rec", "Step", "TestTime", "Current [A]", "Voltage [V]", "Unnamed: 5",
+            "Md"
+        ], 'Columns should be named as in a CSV file'
+
+        # Check the header row can be given, the cycler and its data types are
+        # then unknown
+        assert parser.read_xlsx(tmp_path / "test.xlsx", "3")[1].astype(
+            data.dtypes
+        ).equals(data), 'Data should be the same when the header row is given'
+
+        # Check the import gives the same data as the CSV file
+        data = parser.data_importer(tmp_path / "test.xlsx", save_option="")
+        expected = parser.data_importer(tmp_path / "test.csv", save_option="")
+        assert data.equals(expected), 'xlsx and csv data should be the same'
+        assert not (tmp_path / "converted_temporary.csv").exists(), \
+            'No temporary file should be written'
+
+        # Check time formatted cells are read as text, as in the CSV file
+        rows = rows[:3] + [
+            [i + 1, 1, time(0, 0, i), 1.5, 3.6, None, "C"] for i in range(3)
+        ]
+        workbook = openpyxl.Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(tmp_path / "test.xlsx")
+        with (tmp_path / "test.csv").open(mode="w", newline="") as f:
+            csv.writer(f).writerows(rows)
+        data = parser.data_importer(tmp_path / "test.xlsx", save_option="")
+        assert data["Time [s]"].tolist() == [0.0, 1.0, 2.0], \
+            'Time formatted cells should be converted to seconds'
+        expected = parser.data_importer(tmp_path / "test.csv", save_option="")
+        assert data.equals(expected), 'xlsx and csv data should be the same'
+
+    def test_read_xlsx_sheets(self, tmp_path):
+        """Test importing the data sheets of an xlsx file"""
+        workbook = openpyxl.Workbook()
+        workbook.active.title = "Info"
+        workbook.active.append(["Summary"])
+        for name in ["Data_1", "Data_2"]:
+            sheet = workbook.create_sheet(name)
+            sheet.append(["Rec", "Step", "TestTime(s)", "Current [A]", "Voltage [V]"])
+            for i in range(5):
+                sheet.append([i, 1, float(i), 1.0, 3.6])
+        workbook.save(tmp_path / "test.xlsx")
+
+        parser = pbdp.Parser()
+        sheets = parser.read_xlsx_sheets(tmp_path / "test.xlsx", sheets="all")
+        assert len(sheets) == 2, 'Only the data sheets should be read'
+
+        # Check the time of the second sheet follows the first one
+        for workers in [1, 2]:
+            data = parser.data_importer(
+                tmp_path / "test.xlsx", save_option="", sheets="all", workers=workers
+            )
+            assert data["Time [s]"].tolist() == [0, 1, 2, 3, 4, 4, 5, 6, 7, 8], \
+                'Time should be continuous'
+
+        data = parser.data_importer(
+            tmp_path / "test.xlsx", save_option="", sheets=["Data_2"]
+        )
+        assert len(data) == 5, 'Only the given sheet should be read'
+
     def test_find_words(self):
         """Test the find_words method"""
         parser = pbdp.Parser()
@@ -248,7 +647,61 @@ class TestOptimisationResult():
         assert encoding == "ascii", 'Encoding should be ascii'
         # assert cycler == #TODO: what should this be?
 
-    def test_split_file(self):
+    def test_find_words_header_window(self, tmp_path):
+        """Test find_words only reading the leading part of the file"""
+        path = Path(pbdp.__path__[0], "input", "data")
+
+        # The window is grown until the keywords are found, so the result should
+        # not depend on its size
+        for file in ["Maccor.csv", "Novonix.csv", "Digatron.csv"]:
+            pointer, encoding, equipment_type = pbdp.Parser().find_words(path / file)
+            for header_window in [64, 65536]:
+                parser = pbdp.Parser(header_window=header_window)
+                found = parser.find_words(path / file)
+                assert found[::2] == (pointer, equipment_type), \
+                    f'Header window {header_window} should not change {file}'
+                # An ASCII window is widened to UTF-8 if the file goes on
+                assert found[1] in [encoding, "utf-8"], \
+                    f'Encoding of {file} should be compatible'
+
+        # Check non-ASCII bytes after the window are decoded
+        contents = (path / "Maccor.csv").read_bytes().split(b"\n")
+        contents[300] = contents[300].replace(b"R", "°".encode(), 1)
+        file = tmp_path / "Maccor.csv"
+        file.write_bytes(b"\n".join(contents))
+        parser = pbdp.Parser(header_window=4096)
+        assert parser.find_words(file)[1] == "utf-8", \
+            'ASCII window should be widened to UTF-8'
+        data = parser.data_importer(file, save_option="")
+        assert len(data) > 0, 'File should be imported'
+
+        # Check the window is not read past the end of a file with no keywords
+        parser = pbdp.Parser(header_window=2)
+        assert parser.find_words(path / "test1.csv") == (None, None), \
+            'No keywords should be found'
+
+    def test_find_words_earliest_match(self):
+        """Test find_words returning the cycler with the earliest keyword"""
+        path = Path(pbdp.__path__[0], "input", "data", "test1.csv")
+
+        # test1.csv contains "abcd"
+        parser = pbdp.Parser(cycler_keywords={"late": ["c"], "early": ["x", "b"]})
+        assert parser.find_words(path) == (1, "ascii", "early"), \
+            'Earliest keyword should give the cycler'
+        assert parser.find_words(path, "late") == (2, "ascii", "late"), \
+            'Given cycler should only search its own keywords'
+
+        # Check the patterns are rebuilt when the keywords change
+        parser.cycler_keywords = {"first": ["a"]}
+        assert parser.find_words(path) == (0, "ascii", "first"), \
+            'New keywords should be used'
+
+        # Check the patterns are rebuilt when the keywords are edited in place
+        parser.cycler_keywords["first"][0] = "d"
+        assert parser.find_words(path) == (3, "ascii", "first"), \
+            'Edited keywords should be used'
+
+    def test_split_file(self, tmp_path):
         """Test the split_file method"""
         path = Path(
             pbdp.__path__[0],
@@ -282,21 +735,302 @@ class TestOptimisationResult():
         assert (path / "pre_processed" / "test1_metadata.txt").exists(), \
             'File should exist'
 
+        # Check split file works with stream, saving the data part too
+        (path / "pre_processed" / "test1_data.csv").unlink()
+        metadata, data = parser.split_file(2, path / "test1.csv", "save all", True)
+        with data:
+            assert (metadata, data.read()) == (b"ab", b"cd"), \
+                'Output should be (b"ab", file containing b"cd")'
+        with (path / "pre_processed" / "test1_data.csv").open(mode="rb") as f:
+            assert f.read() == b"cd", 'Saved data should be b"cd"'
+
         # Clean up
         (path / "pre_processed" / "test1_data.csv").unlink()
         (path / "pre_processed" / "test1_metadata.txt").unlink()
         # TODO: this is also problematic
         # (path / "pre_processed").rmdir()
 
+        # Check the first line of the data is skipped when it is empty or starts
+        # with a delimiter, both reading the whole file and streaming it
+        for contents in [b"meta\r\nx,y\r\n1,2", b"meta,,\r\nx,y\n1,2"]:
+            file = tmp_path / "test.csv"
+            file.write_bytes(contents)
+            metadata, data = parser.split_file(4, file, "save first")
+            assert (metadata, data) == (b"meta", b"x,y\n1,2"), \
+                'First line should be skipped'
+            metadata, data = parser.split_file(4, file, "save first", stream=True)
+            with data:
+                assert data.read().splitlines() == [b"x,y", b"1,2"], \
+                    'First line should be skipped'
+
     def test_read_data_to_pandas(self):
         """Test the read_data_to_pandas method"""
-        pass
+        path = Path(pbdp.__path__[0], "input", "data")
+        parser = pbdp.Parser()
+
+        # Check csv and tab separated data are read from memory
+        data = parser.read_data_to_pandas(b"a,b\n1,2\n3,4", path / "x.csv", "ascii")
+        assert data.columns.tolist() == ["a", "b"], 'Columns should be a and b'
+        assert data["b"].tolist() == [2, 4], 'Values should be read'
+        data = parser.read_data_to_pandas(b"a\tb\n1\t2", path / "x.DTA", "ascii")
+        assert data.columns.tolist() == ["a", "b"], 'Columns should be a and b'
+
+        # Check no temporary file is left behind
+        assert not (path / "new_file_name").exists(), 'No file should be written'
+
+        # Check unsupported extension
+        with pytest.raises(ValueError, match="Invalid file format"):
+            parser.read_data_to_pandas(b"a,b\n1,2", path / "x.abc", "ascii")
+
+        # Check the data types are applied and the row of units is skipped
+        dtype = parser.cycler_dtypes["digatron"]
+        data = parser.read_data_to_pandas(
+            b"Step,Status,Voltage\n[],[],[V]\n1,PAU,3.1\n2,CHA,3.2",
+            path / "x.csv", "ascii", dtype=dtype
+        )
+        assert len(data) == 2, 'Row of units should be skipped'
+        assert data["Step"].dtype == "int32", 'Step should be int32'
+        assert data["Status"].dtype == "category", 'Status should be category'
+        assert data["Voltage"].dtype == "float64", 'Voltage should be float64'
+        assert data["Voltage"].tolist() == [3.1, 3.2], \
+            'Measured values should not lose precision'
+
+        # Check the types are inferred if the data does not match them
+        data = parser.read_data_to_pandas(
+            b"Step,Status,Voltage\n1,PAU,3.1\nx,CHA,3.2",
+            path / "x.csv", "ascii", dtype=dtype
+        )
+        assert data["Step"].tolist() == ["1", "x"], 'Step should be inferred'
+
+        # Check the pyarrow engine reads the data as the C engine does
+        for data in [
+            b"Step,Status,Voltage,\n[],[],[V],\n1,PAU,3.1,\n2,CHA,3.2,",
+            b"a,a,b\n1,2,3",
+            b"a,b\n,1,2",
+        ]:
+            expected = parser.read_data_to_pandas(
+                data, path / "x.csv", "ascii", dtype=dtype
+            )
+            assert parser.read_data_to_pandas(
+                data, path / "x.csv", "ascii", dtype=dtype, engine="pyarrow"
+            ).equals(expected), 'pyarrow and C engines should read the same data'
 
     def test_change_units(self):
         pass
 
+    def test_parse_durations(self):
+        """Test the parse_durations method"""
+        parser = pbdp.Parser()
+        expected = [1.0, 90000.5, np.nan, 172800.0]
+        for durations in [
+            ["0:00:01", "25:00:00.5", None, "48:00:00"],
+            ["0.00:00:01", "1.01:00:00.5", None, "2.00:00:00"],
+            ["0 days 00:00:01", "1 day 01:00:00.5", None, "2 days 00:00:00"],
+        ]:
+            seconds = parser.parse_durations(pd.Series(durations))
+            assert np.allclose(seconds, expected, equal_nan=True), \
+                f'{durations} should be converted to seconds'
+
+        # Check days are found after the sample used to detect the format
+        seconds = parser.parse_durations(
+            pd.Series(["23:59:59", "1.00:00:01"]), sample_size=1
+        )
+        assert seconds.tolist() == [86399.0, 86401.0], 'Days should be added'
+
+        # Check invalid durations still raise an error
+        with pytest.raises(ValueError):
+            parser.parse_durations(pd.Series(["0:00:01", "x"]))
+
     def test_change_headers(self):
-        pass
+        """Test the change_headers method"""
+        parser = pbdp.Parser()
+        data = pd.DataFrame(
+            {"Current, A": ["1"], "voltage [v]": [2], "Step": [3], "Other": [4]}
+        )
+        data = parser.change_headers(data)
+        assert data.columns.tolist() == [
+            "Current [A]", "Voltage [V]", "Step Number", "Other"
+        ], 'Headers should be matched after normalization'
+        assert data["Current [A]"].tolist() == [1], 'Values should be numeric'
+
+        # Check the lookup is rebuilt with the standard headers
+        parser.standard_headers = {"Step [#]": ["Step"]}
+        data = parser.change_headers(pd.DataFrame({"Step": [3]}))
+        assert data.columns.tolist() == ["Step [#]"], 'New headers should be used'
+
+        # Check the lookup is rebuilt when the headers are edited in place
+        parser.standard_headers["Step [#]"].append("Stp")
+        data = parser.change_headers(pd.DataFrame({"Stp": [3]}))
+        assert data.columns.tolist() == ["Step [#]"], 'Edited headers should be used'
 
     def test_remove_unwanted(self):
-        pass
+        """Test the remove_unwanted method"""
+        parser = pbdp.Parser()
+
+        def data():
+            return pd.DataFrame({
+                "Step Number": [1, 1, 2, 2, 9],
+                "Voltage [V]": [3.0, np.nan, 3.1, 3.2, 3.3],
+                "Aux": [0, 0, np.nan, 0, 0],
+                "Unnamed: 3": [np.nan] * 5,
+            }, index=range(10, 15))
+
+        cleaned = parser.remove_unwanted(data())
+        assert cleaned.columns.tolist() == ["Step Number", "Voltage [V]", "Aux"], \
+            'Unnamed columns should be dropped'
+        assert cleaned["Voltage [V]"].tolist() == [3.0, 3.2], \
+            'Rows with missing values and after a step jump should be dropped'
+        assert cleaned.index.tolist() == [0, 1], 'Index should be reset'
+
+        # Check only the standard columns are used to drop rows
+        cleaned = parser.remove_unwanted(data(), na_option="standard")
+        assert cleaned["Voltage [V]"].tolist() == [3.0, 3.1, 3.2], \
+            'Missing values of other columns should be kept'
+
+    def test_absolute_time(self):
+        """Test the absolute_time method"""
+        parser = pbdp.Parser()
+        data = pd.DataFrame({"Time [s]": [0.0, 1.5, 0.25]})
+        data = parser.absolute_time(b"Started,17/08/2018 14:30\n", data, "ascii")
+        assert data["Absolute Time [s]"].dtype == "datetime64[ns]", \
+            'Absolute time should be a datetime64 column'
+        assert data["Absolute Time [s]"].tolist() == [
+            pd.Timestamp("2018-08-17 14:30:00"),
+            pd.Timestamp("2018-08-17 14:30:01.5"),
+            pd.Timestamp("2018-08-17 14:30:01.75"),
+        ], 'Absolute time should add the cumulative time to the start time'
+
+    def test_parse_metadata(self):
+        """Test the parse_metadata and find_start_time methods"""
+        parser = pbdp.Parser()
+        metadata = "Time,10:00:00,\nDATE\tLABEL\t15/3/2022\tDate\nTIME\tLABEL\t14:56:32"
+        assert parser.parse_metadata(metadata) == {
+            "DATE": "15/3/2022", "TIME": "14:56:32", "Time": "10:00:00"
+        }, 'Fields should be found in the order of start_time_patterns'
+        assert parser.find_start_time(metadata) == "15/3/2022", \
+            'Start time should be the first field'
+        assert parser.find_start_time("No date") == "", \
+            'Start time should be empty if no field is found'
+
+        # Check the date and time are combined
+        data = parser.absolute_time(metadata, pd.DataFrame({"Time [s]": [0.0]}), "")
+        assert data["Absolute Time [s]"][0] == pd.Timestamp("2022-03-15 14:56:32"), \
+            'Date and time should be combined'
+
+        # Check the cache is reset with the patterns
+        parser.start_time_patterns = {"Time": r"Time,(\d+:\d+:\d+),"}
+        assert parser.parse_metadata(metadata) == {"Time": "10:00:00"}, \
+            'Fields should be found with the new patterns'
+
+        # Check the patterns are compiled again when edited in place
+        parser.start_time_patterns["Begin"] = r"Begin,([^,\r\n]+)"
+        assert parser.find_start_time("Begin,1/2/2020 10:00") == "1/2/2020 10:00", \
+            'Edited start time patterns should be used'
+
+        # Check only the most recent files are cached
+        for i in range(parser.metadata_cache_size + 5):
+            parser.parse_metadata(f"Time,10:00:{i:02d},")
+        assert len(parser._metadata_cache) == parser.metadata_cache_size, \
+            'Cache should be bounded'
+        assert parser.parse_metadata("Time,10:00:20,") == {"Time": "10:00:20"}, \
+            'Recent files should be cached'
+
+    def test_extract_metadata(self, tmp_path):
+        """Test the metadata record of an imported file"""
+        file = tmp_path / "Maccor.csv"
+        shutil.copy(Path(pbdp.__path__[0], "input", "data", "Maccor.csv"), file)
+
+        parser = pbdp.Parser()
+        parser.data_importer(file)
+        expected = {
+            "equipment_type": "maccor",
+            "start_time": datetime(2018, 8, 17, 14, 30),
+            "name": "test",
+            "channel": 41,
+            "tester": "Maccor #3",
+            "procedure": "MJL_GITT_Cylin.000",
+            "description": "test 5 Ah cell",
+        }
+        assert parser.import_report[file]["metadata"] == expected, \
+            'Metadata record should be reported'
+
+        # Check the record is saved next to the processed data
+        with (tmp_path / "processed" / "Maccor_metadata.json").open() as f:
+            saved = json.load(f)
+        assert saved == {**expected, "start_time": "2018-08-17T14:30:00"}, \
+            'Metadata record should be saved as JSON'
+
+        # Check a cycler without fields only gets the start time
+        assert parser.extract_metadata(b"Started,17/08/2018 14:30", "ascii", "x") == {
+            "equipment_type": "x", "start_time": datetime(2018, 8, 17, 14, 30)
+        }, 'Record should only have the start time'
+
+        # Check only the numeric fields are converted, and not finite values are
+        # dropped
+        parser.metadata_fields = {"x": {
+            "name": r"Name,(\w+)", "channel": r"Channel,(\w+)",
+            "mass": r"Mass,(\w+)", "capacity": r"Capacity,(\w+)",
+        }}
+        record = parser.extract_metadata(
+            "Name,00123\nChannel,007\nMass,1E5\nCapacity,NaN", "ascii", "x"
+        )
+        assert record == {
+            "equipment_type": "x", "start_time": None, "name": "00123",
+            "channel": 7, "mass": 100000.0, "capacity": None,
+        }, 'Only numeric fields should be converted'
+        save.save_metadata(record, tmp_path / "x.csv")
+        with (tmp_path / "processed" / "x_metadata.json").open() as f:
+            assert json.load(f)["capacity"] is None, 'Record should be valid JSON'
+
+        # Check the fields are compiled again when edited in place
+        parser.metadata_fields["y"] = {"cell": r"Cell,(\w+)"}
+        assert parser.extract_metadata("Cell,A1", "ascii", "y")["cell"] == "A1", \
+            'Edited metadata fields should be used'
+
+    def test_sanity_check(self):
+        """Test the three electrode check of the sanity_check method"""
+        parser = pbdp.Parser()
+        voltage = np.full(5000, 3.5)
+        voltage[[10, 11, 12, 4000]] = 3.0
+        data = pd.DataFrame({
+            "Time [s]": np.ones(5000),
+            "Current [A]": np.zeros(5000),
+            "Working electrode potential [V]": np.full(5000, 3.6),
+            "Counter electrode potential [V]": np.full(5000, 0.1),
+            "Voltage [V]": voltage,
+        })
+        report = parser.sanity_check(data)
+        assert not report["passed"], 'Corrupted voltages should fail the check'
+        checks = report["three_electrode"]
+        assert (checks["checked"], checks["violations"]) == (5000, 4), \
+            'Every row should be checked'
+        assert checks["ranges"] == [(10, 12), (4000, 4000)], \
+            'Runs of violations should be reported as ranges'
+
+        # Check the sampled mode only checks the chosen blocks
+        checks = parser.check_three_electrode(
+            data, "sample", sample_blocks=2, block_size=100, seed=0
+        )
+        assert checks["checked"] == 200, 'Only the sampled rows should be checked'
+        assert parser.check_three_electrode(data.iloc[100:4000], "sample")["passed"], \
+            'Consistent voltages should pass the check'
+
+        # Check the reports of consecutive chunks are merged
+        merged = parser._merge_check_reports(
+            parser.sanity_check(data.iloc[:12]), parser.sanity_check(data.iloc[12:]), 12
+        )
+        assert merged["three_electrode"]["ranges"] == [(10, 12), (4000, 4000)], \
+            'Ranges should continue across chunks'
+
+        # Check the largest deviation is None when every voltage is missing
+        missing = data.assign(**{"Voltage [V]": np.nan})
+        checks = parser.check_three_electrode(missing)
+        assert (checks["violations"], checks["max_residual"]) == (5000, None), \
+            'Missing voltages should be violations without a deviation'
+        merged = parser._merge_check_reports(
+            parser.sanity_check(data), parser.sanity_check(missing), 5000
+        )
+        assert merged["three_electrode"]["max_residual"] == pytest.approx(0.5), \
+            'Largest deviation should skip the missing one'
+        assert parser.sanity_check(data, check_option="")["passed"], \
+            'The three electrode check should be skipped'